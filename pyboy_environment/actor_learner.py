@@ -0,0 +1,320 @@
+"""
+Shared-memory experience ring buffer for concurrent actor and learner processes.
+
+Actors run PokemonBrock environments and write transitions straight into one
+SharedMemory block (uint8 frames, float32 stats, actions, rewards, done flags), so
+nothing is pickled or copied through queues. Each actor owns a contiguous segment
+of the ring and is the only writer there, which keeps writes lock-free. Every slot
+carries a sequence number that is cleared while the slot is written; the learner
+re-checks the numbers after copying a batch and drops transitions that were
+overwritten underneath it.
+"""
+
+import argparse
+import logging
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+from pyboy_environment.environments.metrics import (
+    EnvMetrics,
+    MetricsSpec,
+    MetricsTable,
+    start_collector,
+)
+from pyboy_environment.environments.pokemon.observations import dequantise
+
+logging.basicConfig(level=logging.INFO)
+
+# Shapes of the stats and frame in PokemonBrock uint8 observations
+BROCK_STATS_DIM = 5
+BROCK_FRAME_SHAPE = (60, 75)
+
+
+class BufferSpec(NamedTuple):
+    name: str
+    capacity: int
+    num_actors: int
+    frame_shape: tuple
+    stats_dim: int
+    action_dim: int
+
+
+def _fields(spec: BufferSpec) -> list[tuple]:
+    return [
+        ("frames", np.uint8, (spec.capacity, *spec.frame_shape)),
+        ("stats", np.float32, (spec.capacity, spec.stats_dim)),
+        ("actions", np.float32, (spec.capacity, spec.action_dim)),
+        ("rewards", np.float32, (spec.capacity,)),
+        ("dones", np.bool_, (spec.capacity,)),
+        ("truncated", np.bool_, (spec.capacity,)),
+        ("seq", np.int64, (spec.capacity,)),
+        ("write_counts", np.int64, (spec.num_actors,)),
+        ("start_time", np.float64, (1,)),
+    ]
+
+
+def _buffer_size(spec: BufferSpec) -> int:
+    size = 0
+    for _, dtype, shape in _fields(spec):
+        # Keep every array 8 byte aligned so the int64 sequence stores stay atomic
+        size += -size % 8
+        size += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return size
+
+
+class ExperienceRingBuffer:
+    def __init__(self, spec: BufferSpec, create: bool = False) -> None:
+        self.spec = spec
+        self.segment = spec.capacity // spec.num_actors
+
+        if create:
+            self._shm = shared_memory.SharedMemory(
+                name=spec.name, create=True, size=_buffer_size(spec)
+            )
+        else:
+            self._shm = shared_memory.SharedMemory(name=spec.name)
+
+        offset = 0
+        for name, dtype, shape in _fields(spec):
+            offset += -offset % 8
+            array = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset)
+            setattr(self, name, array)
+            offset += array.nbytes
+
+        if create:
+            self.seq[:] = -1
+            self.write_counts[:] = 0
+            self.start_time[0] = time.time()
+
+        self.samples_drawn = 0
+        self.samples_rejected = 0
+
+    @classmethod
+    def create(
+        cls,
+        capacity: int,
+        num_actors: int,
+        frame_shape: tuple = BROCK_FRAME_SHAPE,
+        stats_dim: int = BROCK_STATS_DIM,
+        action_dim: int = 1,
+        name: str = None,
+    ) -> "ExperienceRingBuffer":
+        # sample() pairs each slot with its successor, so every actor needs two
+        if capacity // num_actors < 2:
+            raise ValueError(
+                f"capacity {capacity} leaves fewer than 2 slots per actor "
+                f"for {num_actors} actors"
+            )
+
+        name = f"pyboy_experience_{mp.current_process().pid}" if name is None else name
+        spec = BufferSpec(
+            name, capacity, num_actors, tuple(frame_shape), stats_dim, action_dim
+        )
+        return cls(spec, create=True)
+
+    @classmethod
+    def attach(cls, spec: BufferSpec) -> "ExperienceRingBuffer":
+        return cls(spec, create=False)
+
+    def write(
+        self,
+        actor_id: int,
+        frame: np.ndarray,
+        stats: np.ndarray,
+        action: np.ndarray,
+        reward: float,
+        done: bool,
+        truncated: bool,
+    ) -> None:
+        count = int(self.write_counts[actor_id])
+        slot = actor_id * self.segment + count % self.segment
+
+        # Sequence is cleared while the slot is inconsistent
+        self.seq[slot] = -1
+        self.frames[slot] = frame
+        self.stats[slot] = stats
+        self.actions[slot] = action
+        self.rewards[slot] = reward
+        self.dones[slot] = done
+        self.truncated[slot] = truncated
+        self.seq[slot] = count
+
+        self.write_counts[actor_id] = count + 1
+
+    def sample(self, batch_size: int, rng: np.random.Generator = None) -> dict:
+        rng = np.random.default_rng() if rng is None else rng
+
+        counts = self.write_counts.copy()
+        actors = np.flatnonzero(counts >= 2)
+        if actors.size == 0:
+            return None
+
+        # Transition k pairs slot k with slot k + 1 of the same actor's segment
+        actor = rng.choice(actors, size=batch_size)
+        high = counts[actor] - 1
+        low = np.maximum(0, counts[actor] - self.segment)
+        k = rng.integers(low, high)
+
+        base = actor * self.segment
+        index = base + k % self.segment
+        next_index = base + (k + 1) % self.segment
+
+        seq_before = (self.seq[index], self.seq[next_index])
+        batch = {
+            "frames": self.frames[index],
+            "stats": self.stats[index],
+            "actions": self.actions[index],
+            "rewards": self.rewards[index],
+            "dones": self.dones[index],
+            "next_frames": self.frames[next_index],
+            "next_stats": self.stats[next_index],
+        }
+        truncated = self.truncated[index]
+        seq_after = (self.seq[index], self.seq[next_index])
+
+        # Truncated steps have no valid successor and are skipped like torn reads
+        valid = (
+            (seq_before[0] == k)
+            & (seq_before[1] == k + 1)
+            & (seq_after[0] == k)
+            & (seq_after[1] == k + 1)
+            & ~truncated
+        )
+
+        self.samples_drawn += int(valid.sum())
+        self.samples_rejected += int((~valid).sum())
+        return {key: value[valid] for key, value in batch.items()}
+
+    def throughput(self) -> dict[str, float]:
+        elapsed = max(time.time() - float(self.start_time[0]), 1e-9)
+        steps = int(self.write_counts.sum())
+        return {
+            "steps_written": steps,
+            "steps_per_sec": steps / elapsed,
+            "samples_drawn": self.samples_drawn,
+            "samples_rejected": self.samples_rejected,
+            "samples_per_sec": self.samples_drawn / elapsed,
+        }
+
+    def close(self) -> None:
+        # Views into the segment must be dropped before it can be closed
+        for name, _, _ in _fields(self.spec):
+            setattr(self, name, None)
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+
+def run_actor(
+    spec: BufferSpec,
+    metrics_spec: MetricsSpec,
+    actor_id: int,
+    num_steps: int,
+    act_freq: int,
+) -> None:
+    from pyboy_environment.environments.pokemon.tasks.brock import PokemonBrock
+
+    buffer = ExperienceRingBuffer.attach(spec)
+    env = PokemonBrock(act_freq=act_freq, profile="train", observation_mode="uint8")
+    metrics = EnvMetrics(MetricsTable.attach(metrics_spec), actor_id)
+    env.set_metrics(metrics)
+
+    state = env.reset()
+    for _ in range(num_steps):
+        action = np.array([env.sample_action()], dtype=np.float32)
+        next_state, reward, done, truncated = env.step(action)
+
+        buffer.write(
+            actor_id, state["frame"], state["stats"], action, reward, done, truncated
+        )
+
+        state = env.reset() if done or truncated else next_state
+
+    env.close()
+    metrics.close()
+    buffer.close()
+
+
+def start_actors(
+    spec: BufferSpec, metrics_spec: MetricsSpec, num_steps: int, act_freq: int
+) -> list:
+    actors = []
+    for actor_id in range(spec.num_actors):
+        process = mp.Process(
+            target=run_actor,
+            args=(spec, metrics_spec, actor_id, num_steps, act_freq),
+            daemon=True,
+        )
+        process.start()
+        actors.append(process)
+    return actors
+
+
+def get_args():
+    parse_args = argparse.ArgumentParser()
+
+    parse_args.add_argument("-a", "--num_actors", type=int, default=4)
+
+    parse_args.add_argument("-c", "--capacity", type=int, default=100000)
+
+    parse_args.add_argument("-s", "--num_steps", type=int, default=10000)
+
+    parse_args.add_argument("-b", "--batch_size", type=int, default=256)
+
+    parse_args.add_argument("--act_freq", type=int, default=24)
+
+    parse_args.add_argument("--metrics_port", type=int, default=None)
+
+    parse_args.add_argument("--metrics_json", type=str, default=None)
+
+    return parse_args.parse_args()
+
+
+def main():
+    args = get_args()
+
+    buffer = ExperienceRingBuffer.create(args.capacity, args.num_actors)
+    metrics_table = MetricsTable.create(args.num_actors)
+    collector, stop_collector = start_collector(
+        metrics_table.spec, args.metrics_port, args.metrics_json
+    )
+    actors = start_actors(
+        buffer.spec, metrics_table.spec, args.num_steps, args.act_freq
+    )
+
+    # Stand-in learner loop - sample batches while the actors collect
+    last_log = time.time()
+    sampled = 0
+    try:
+        while any(actor.is_alive() for actor in actors):
+            batch = buffer.sample(args.batch_size)
+            if batch is None:
+                time.sleep(0.1)
+                continue
+            # Frames stay uint8 in the buffer and are only converted per batch
+            states = dequantise(batch["frames"], batch["stats"])
+            sampled += len(states)
+            if time.time() - last_log > 10:
+                logging.info(f"Throughput: {buffer.throughput()}")
+                logging.info(f"Learner sampled {sampled} states of {states.shape[1:]}")
+                last_log = time.time()
+    finally:
+        for actor in actors:
+            actor.join()
+        logging.info(f"Final Throughput: {buffer.throughput()}")
+        logging.info(f"Env Metrics: {metrics_table.snapshot()['totals']}")
+        stop_collector.set()
+        collector.join()
+        metrics_table.close()
+        metrics_table.unlink()
+        buffer.close()
+        buffer.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Batched evaluation driver - steps several PokemonBrock instances in lock-step and
+runs the policy once per batch of observations rather than once per state.
+"""
+
+import argparse
+import json
+import logging
+
+import numpy as np
+
+import cares_reinforcement_learning.util.configurations as configurations
+from cares_reinforcement_learning.util.network_factory import NetworkFactory
+from pyboy_environment.environments.pokemon.stats_log import StatsRecorder
+from pyboy_environment.environments.vector_environment import PyboyVectorEnvironment
+from pyboy_environment.environments.pokemon.tasks.brock import PokemonBrock
+
+logging.basicConfig(level=logging.INFO)
+
+
+def get_args():
+    parse_args = argparse.ArgumentParser()
+
+    parse_args.add_argument("-p", "--model_path", type=str, required=True)
+
+    parse_args.add_argument("-n", "--model_name", type=str, required=True)
+
+    parse_args.add_argument("-r", "--results_path", type=str, required=True)
+
+    parse_args.add_argument("-e", "--num_envs", type=int, default=8)
+
+    parse_args.add_argument("-s", "--num_steps", type=int, default=10000)
+
+    # Optional directory for per-step stats logs (one memory-mapped file per env)
+    parse_args.add_argument("--stats_path", type=str, default=None)
+
+    return parse_args.parse_args()
+
+
+def select_actions(agent, states: np.ndarray) -> np.ndarray:
+    actor = getattr(agent, "actor_net", None)
+
+    # Agents without an exposed actor network fall back to one call per state
+    if actor is None:
+        return np.stack(
+            [
+                agent.select_action_from_policy(state, evaluation=True)
+                for state in states
+            ]
+        )
+
+    import torch
+
+    # The actor's mode is restored afterwards rather than forced back to training
+    was_training = actor.training
+    actor.eval()
+    with torch.no_grad():
+        device = getattr(agent, "device", "cpu")
+        state_tensor = torch.as_tensor(states, dtype=torch.float32, device=device)
+        actions = actor(state_tensor)
+        # Stochastic actors return (sample, log_pi, mean) - evaluation uses the mean
+        if isinstance(actions, tuple):
+            actions = actions[-1]
+    actor.train(was_training)
+
+    return actions.cpu().numpy()
+
+
+def run_agent_batched(envs, agent, num_steps, results_path, stats_path=None):
+    recorders = []
+    if stats_path is not None:
+        recorders = [
+            StatsRecorder(f"{stats_path}/stats_{i}.bin") for i in range(len(envs))
+        ]
+
+    # evaluate.py only resets on done, so truncated episodes carry on here too
+    vector_env = PyboyVectorEnvironment(envs, autoreset_on_truncation=False)
+    states, _ = vector_env.reset()
+
+    episodes = np.zeros(len(envs), dtype=np.uint32)
+    episode_steps = np.zeros(len(envs), dtype=np.uint32)
+    for step in range(0, num_steps):
+        if step % 100 == 0:
+            logging.info(f"Step: {step}")
+
+        actions = select_actions(agent, states.astype(np.float32))
+        states, rewards, terminated, _, _ = vector_env.step(actions)
+
+        episode_steps += 1
+        for i, recorder in enumerate(recorders):
+            recorder.append(
+                vector_env.last_stats[i],
+                rewards[i],
+                actions[i],
+                episode_steps[i],
+                episodes[i],
+            )
+
+        # Only terminated environments are reset by the vector environment
+        episodes[terminated] += 1
+        episode_steps[terminated] = 0
+
+    for recorder in recorders:
+        recorder.close()
+
+    results = []
+    for i, env in enumerate(envs):
+        final_stats = env._generate_game_stats()
+        final_stats["actions"] = step
+        logging.info(f"Final Stats {i}: {final_stats}")
+        results.append(final_stats)
+
+    with open(f"{results_path}/batch_results.json", "w", encoding="utf-8") as file:
+        json.dump(results, file)
+
+
+def run(
+    results_path,
+    model_file_path,
+    model_file_name,
+    num_envs,
+    num_steps,
+    stats_path=None,
+):
+    algorithm = model_file_name.split("-")[0]
+
+    class_ = getattr(configurations, f"{algorithm}Config")
+    algorithm_config = class_()
+
+    network_factory = NetworkFactory()
+
+    envs = [PokemonBrock(act_freq=24, profile="eval") for _ in range(num_envs)]
+
+    agent = network_factory.create_network(
+        envs[0].observation_space, envs[0].action_num, algorithm_config
+    )
+
+    agent.load_models(model_file_path, model_file_name)
+
+    run_agent_batched(envs, agent, num_steps, results_path, stats_path)
+
+
+def main():
+    args = get_args()
+
+    run(
+        args.results_path,
+        args.model_path,
+        args.model_name,
+        args.num_envs,
+        args.num_steps,
+        args.stats_path,
+    )
+
+
+if __name__ == "__main__":
+    main()
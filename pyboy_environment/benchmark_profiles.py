@@ -0,0 +1,95 @@
+"""
+Measures what each emulator profile costs: environment construction, reset and
+raw emulator frames per second, plus environment steps per second with random
+actions. Speed is left unlimited for every profile so the numbers compare the
+per-frame work rather than the frame limiter. Raw frames are rendered only when
+the profile (or the task's screen observations) would render them.
+"""
+
+import argparse
+import json
+import logging
+import time
+
+from pyboy_environment import suite
+from pyboy_environment.environments.emulator_pool import get_pool
+from pyboy_environment.environments.emulator_profiles import PROFILES
+
+logging.basicConfig(level=logging.INFO)
+
+
+def benchmark_profile(
+    domain: str, task: str, profile_name: str, act_freq: int, num_steps: int
+) -> dict[str, float]:
+    profile = PROFILES[profile_name]._replace(emulation_speed=0)
+
+    # A fresh emulator is created rather than one reused from the pool
+    get_pool().clear()
+    start = time.perf_counter()
+    env = suite.make(domain, task, act_freq, profile=profile)
+    construct_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    env.reset()
+    reset_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    env.pyboy.tick(num_steps * act_freq, env.render_frames)
+    frames_per_sec = num_steps * act_freq / (time.perf_counter() - start)
+
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        _, _, done, truncated = env.step(env.sample_action())
+        if done or truncated:
+            env.reset()
+    steps_per_sec = num_steps / (time.perf_counter() - start)
+
+    env.close()
+    get_pool().clear()
+
+    return {
+        "construct_sec": construct_time,
+        "reset_sec": reset_time,
+        "frames_per_sec": frames_per_sec,
+        "steps_per_sec": steps_per_sec,
+    }
+
+
+def get_args():
+    parse_args = argparse.ArgumentParser()
+
+    parse_args.add_argument("-d", "--domain", type=str, default="pokemon")
+
+    parse_args.add_argument("-t", "--task", type=str, default="brock")
+
+    parse_args.add_argument(
+        "-p", "--profiles", type=str, nargs="+", default=["train", "eval"]
+    )
+
+    parse_args.add_argument("-s", "--num_steps", type=int, default=1000)
+
+    parse_args.add_argument("--act_freq", type=int, default=24)
+
+    parse_args.add_argument("-r", "--results_path", type=str, default=None)
+
+    return parse_args.parse_args()
+
+
+def main():
+    args = get_args()
+
+    results = {}
+    for profile_name in args.profiles:
+        results[profile_name] = benchmark_profile(
+            args.domain, args.task, profile_name, args.act_freq, args.num_steps
+        )
+        logging.info(f"{profile_name}: {results[profile_name]}")
+
+    if args.results_path is not None:
+        with open(args.results_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
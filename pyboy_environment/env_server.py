@@ -0,0 +1,491 @@
+"""
+Environment server hosting groups of suite.make environments behind a socket.
+
+Emulators run in the server process; learners talk to it through EnvClient, which
+mirrors PyboyVectorEnvironment (reset returns (obs, info), step returns
+(obs, rewards, terminated, truncated, info)), so batched loops work unchanged.
+
+Every message is a fixed header (opcode, flags, group, request id, payload length)
+followed by a binary payload:
+
+    SPEC  -> json description of the groups and the observation layout
+    RESET seed(int64, -1 for none) -> observations
+    STEP  actions(float32 [num_envs, action_num]) -> rewards(float32), terminated,
+          truncated and final observation mask (uint8 each), observations, then the
+          final observations of the masked envs
+    CLOSE ends the connection, the environments stay up for the next client
+
+Observations are sent as raw arrays in the layout from SPEC (uint8 frames when the
+task runs in a uint8 observation mode). With the COMPRESSED flag set on a request
+the observation section of its response is zlib compressed. Requests carry ids and
+each group is served by its own thread, so a client can keep several requests in
+flight (e.g. one per group) and collect the responses as they complete.
+
+The protocol has no authentication, so TCP addresses must be loopback - use an ssh
+tunnel to reach the server from another machine.
+"""
+
+import argparse
+import ipaddress
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pyboy_environment.environments.vector_environment import PyboyVectorEnvironment
+
+logging.basicConfig(level=logging.INFO)
+
+# opcode, flags, group, request id, payload length
+HEADER = struct.Struct("<BBHII")
+SEED = struct.Struct("<q")
+
+SPEC, RESET, STEP, CLOSE, ERROR = 1, 2, 3, 4, 255
+COMPRESSED = 0x01
+
+
+def parse_address(address: str) -> tuple:
+    # "unix:/path/to/socket" or "tcp:host:port"
+    kind, _, target = address.partition(":")
+    if kind == "unix":
+        return socket.AF_UNIX, target
+    if kind == "tcp":
+        host, _, port = target.rpartition(":")
+        if host != "localhost":
+            try:
+                loopback = ipaddress.ip_address(host).is_loopback
+            except ValueError:
+                loopback = False
+            if not loopback:
+                raise ValueError(f"TCP address must be loopback: {address}")
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        return family, (host, int(port))
+    raise ValueError(f"Unknown address: {address}")
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = conn.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Connection closed")
+        received += count
+    return buffer
+
+
+def send_message(
+    conn: socket.socket,
+    opcode: int,
+    flags: int,
+    group: int,
+    request_id: int,
+    payload: bytes,
+) -> None:
+    conn.sendall(HEADER.pack(opcode, flags, group, request_id, len(payload)) + payload)
+
+
+def recv_message(conn: socket.socket) -> tuple:
+    opcode, flags, group, request_id, length = HEADER.unpack(
+        _recv_exact(conn, HEADER.size)
+    )
+    return opcode, flags, group, request_id, _recv_exact(conn, length)
+
+
+def observation_layout(observations) -> list[tuple]:
+    # (key, dtype, per-env shape) of a batch - key is None for plain array batches
+    if isinstance(observations, dict):
+        items = observations.items()
+    else:
+        items = [(None, observations)]
+    layout = []
+    for key, value in items:
+        value = np.asarray(value)
+        layout.append((key, value.dtype.str, list(value.shape[1:])))
+    return layout
+
+
+def pack_observations(observations, layout: list[tuple]) -> bytes:
+    if layout[0][0] is None:
+        arrays = [observations]
+    else:
+        arrays = [observations[key] for key, _, _ in layout]
+    return b"".join(
+        np.ascontiguousarray(array, dtype=dtype).tobytes()
+        for array, (_, dtype, _) in zip(arrays, layout)
+    )
+
+
+def unpack_observations(
+    buffer: bytearray, layout: list[tuple], count: int, offset: int = 0
+) -> tuple:
+    arrays = {}
+    for key, dtype, shape in layout:
+        dtype = np.dtype(dtype)
+        size = count * int(np.prod(shape))
+        arrays[key] = np.frombuffer(buffer, dtype, size, offset).reshape(count, *shape)
+        offset += size * dtype.itemsize
+
+    if layout[0][0] is None:
+        return arrays[None], offset
+    return arrays, offset
+
+
+class EnvServer:
+    def __init__(
+        self,
+        address: str,
+        groups: list[PyboyVectorEnvironment],
+        compress_level: int = 1,
+    ) -> None:
+        self.address = address
+        self.groups = groups
+        self.compress_level = compress_level
+
+        # One thread per group keeps its requests in order while groups overlap
+        self._executors = [ThreadPoolExecutor(max_workers=1) for _ in groups]
+        self._sock = None
+        self._stopping = threading.Event()
+
+        observations, _ = groups[0].reset()
+        self.layout = observation_layout(observations)
+
+        env = groups[0].envs[0]
+        self.spec = {
+            "num_groups": len(groups),
+            "num_envs": groups[0].num_envs,
+            "layout": self.layout,
+            "observation_space": env.observation_space,
+            "action_num": env.action_num,
+            "min_action_value": env.min_action_value,
+            "max_action_value": env.max_action_value,
+        }
+
+    @classmethod
+    def make(
+        cls,
+        address: str,
+        domain: str,
+        task: str,
+        num_envs: int,
+        num_groups: int = 1,
+        act_freq: int = 24,
+        profile: str = "train",
+        env_kwargs: dict = None,
+        compress_level: int = 1,
+    ) -> "EnvServer":
+        groups = [
+            PyboyVectorEnvironment.make(
+                domain,
+                task,
+                num_envs,
+                act_freq,
+                profile=profile,
+                env_kwargs=env_kwargs,
+            )
+            for _ in range(num_groups)
+        ]
+        return cls(address, groups, compress_level)
+
+    def _encode(self, flags: int, head: bytes, body: bytes) -> tuple[int, bytes]:
+        if flags & COMPRESSED:
+            body = zlib.compress(body, self.compress_level)
+        return flags & COMPRESSED, head + body
+
+    def _process(self, opcode: int, flags: int, group: int, payload: bytes) -> tuple:
+        envs = self.groups[group]
+        try:
+            if opcode == SPEC:
+                return SPEC, 0, json.dumps(self.spec).encode("utf-8")
+
+            if opcode == RESET:
+                (seed,) = SEED.unpack(payload)
+                observations, _ = envs.reset(seed=None if seed < 0 else seed)
+                body = pack_observations(observations, self.layout)
+                return (RESET, *self._encode(flags, b"", body))
+
+            if opcode == STEP:
+                actions = np.frombuffer(payload, np.float32).reshape(envs.num_envs, -1)
+                observations, rewards, terminated, truncated, info = envs.step(actions)
+
+                mask = info["_final_observation"]
+                head = b"".join(
+                    [
+                        rewards.astype(np.float32).tobytes(),
+                        terminated.astype(np.uint8).tobytes(),
+                        truncated.astype(np.uint8).tobytes(),
+                        mask.astype(np.uint8).tobytes(),
+                    ]
+                )
+                # Final observations follow env by env as single observation batches
+                body = pack_observations(observations, self.layout) + b"".join(
+                    pack_observations(self._batch_of_one(final), self.layout)
+                    for final in info["final_observation"][mask]
+                )
+                return (STEP, *self._encode(flags, head, body))
+
+            raise ValueError(f"Unknown opcode: {opcode}")
+        except Exception as error:
+            logging.exception("Environment server request failed")
+            return ERROR, 0, str(error).encode("utf-8")
+
+    def _batch_of_one(self, observation):
+        if isinstance(observation, dict):
+            return {key: np.asarray(value)[None] for key, value in observation.items()}
+        return np.asarray(observation)[None]
+
+    def _handle(self, conn: socket.socket) -> None:
+        # Guards sends and the pending set, and is notified as each reply goes out
+        send_lock = threading.Condition()
+        pending = set()
+
+        def respond(future, group: int, request_id: int) -> None:
+            opcode, flags, payload = future.result()
+            with send_lock:
+                try:
+                    send_message(conn, opcode, flags, group, request_id, payload)
+                except OSError:
+                    pass
+                pending.discard(future)
+                send_lock.notify_all()
+
+        try:
+            while True:
+                opcode, flags, group, request_id, payload = recv_message(conn)
+                if opcode == CLOSE:
+                    break
+
+                if group >= len(self.groups):
+                    with send_lock:
+                        message = f"Unknown group: {group}".encode("utf-8")
+                        send_message(conn, ERROR, 0, group, request_id, message)
+                    continue
+
+                future = self._executors[group].submit(
+                    self._process, opcode, flags, group, payload
+                )
+                with send_lock:
+                    pending.add(future)
+                future.add_done_callback(
+                    lambda f, g=group, r=request_id: respond(f, g, r)
+                )
+        except ConnectionError:
+            pass
+        finally:
+            # In-flight requests are answered before the connection closes
+            with send_lock:
+                send_lock.wait_for(lambda: not pending)
+            conn.close()
+
+    def serve_forever(self) -> None:
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(target):
+            os.unlink(target)
+
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        if family != socket.AF_UNIX:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(target)
+        self._sock.listen()
+        # accept() wakes periodically to notice shutdown() on platforms where
+        # shutting down a listening socket does not interrupt it
+        self._sock.settimeout(0.5)
+        logging.info(f"Serving {self.spec['num_groups']} groups on {self.address}")
+
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn, _ = self._sock.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    if self._stopping.is_set():
+                        break
+                    raise
+                if family != socket.AF_UNIX:
+                    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self._sock.close()
+            self.close()
+
+    def shutdown(self) -> None:
+        # Safe to call from another thread - serve_forever() returns promptly
+        self._stopping.set()
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+        for envs in self.groups:
+            envs.close()
+
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(target):
+            os.unlink(target)
+
+
+class EnvClient:
+    def __init__(self, address: str, group: int = 0, compress: bool = False) -> None:
+        family, target = parse_address(address)
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.connect(target)
+        if family != socket.AF_UNIX:
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        # Default group for calls that do not name one
+        self.group = group
+        self.flags = COMPRESSED if compress else 0
+
+        self._next_id = 0
+        self._responses: dict[int, tuple] = {}
+
+        _, payload = self._wait(self._send(SPEC, b"", group))
+        spec = json.loads(payload)
+        self.num_groups = spec["num_groups"]
+        self.num_envs = spec["num_envs"]
+        self.layout = [tuple(entry) for entry in spec["layout"]]
+        self.observation_space = spec["observation_space"]
+        self.action_num = spec["action_num"]
+        self.min_action_value = spec["min_action_value"]
+        self.max_action_value = spec["max_action_value"]
+
+    def _send(self, opcode: int, payload: bytes, group: int = None) -> int:
+        group = self.group if group is None else group
+        request_id = self._next_id
+        self._next_id = (self._next_id + 1) % 2**32
+        send_message(self._sock, opcode, self.flags, group, request_id, payload)
+        return request_id
+
+    def _wait(self, request_id: int) -> tuple:
+        # Responses for other in-flight requests are kept until they are waited on
+        while request_id not in self._responses:
+            opcode, flags, _, response_id, payload = recv_message(self._sock)
+            self._responses[response_id] = (opcode, flags, payload)
+
+        opcode, flags, payload = self._responses.pop(request_id)
+        if opcode == ERROR:
+            raise RuntimeError(f"Environment server error: {payload.decode('utf-8')}")
+        return flags, payload
+
+    def _body(self, flags: int, payload: bytearray, head_size: int) -> bytearray:
+        if flags & COMPRESSED:
+            return bytearray(zlib.decompress(payload[head_size:]))
+        return payload[head_size:]
+
+    def reset_async(self, seed: int = None, group: int = None) -> int:
+        return self._send(RESET, SEED.pack(-1 if seed is None else seed), group)
+
+    def reset_wait(self, request_id: int) -> tuple:
+        flags, payload = self._wait(request_id)
+        observations, _ = unpack_observations(
+            self._body(flags, payload, 0), self.layout, self.num_envs
+        )
+        return observations, {}
+
+    def reset(self, seed: int = None, options: dict = None, group: int = None) -> tuple:
+        # options is accepted for Gymnasium compatibility - tasks take no reset options
+        return self.reset_wait(self.reset_async(seed, group))
+
+    def step_async(self, actions: np.ndarray, group: int = None) -> int:
+        actions = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, -1)
+        return self._send(STEP, actions.tobytes(), group)
+
+    def step_wait(self, request_id: int) -> tuple:
+        flags, payload = self._wait(request_id)
+
+        n = self.num_envs
+        rewards = np.frombuffer(payload, np.float32, n, 0).copy()
+        flag_arrays = np.frombuffer(payload, np.uint8, 3 * n, 4 * n).reshape(3, n)
+        terminated, truncated, mask = flag_arrays.astype(bool)
+
+        body = self._body(flags, payload, 7 * n)
+        observations, offset = unpack_observations(body, self.layout, n)
+
+        final_observation = np.full(n, None, dtype=object)
+        for i in np.flatnonzero(mask):
+            final, offset = unpack_observations(body, self.layout, 1, offset)
+            if isinstance(final, dict):
+                final = {key: value[0] for key, value in final.items()}
+            else:
+                final = final[0]
+            final_observation[i] = final
+
+        info = {"final_observation": final_observation, "_final_observation": mask}
+        return observations, rewards, terminated, truncated, info
+
+    def step(self, actions: np.ndarray, group: int = None) -> tuple:
+        return self.step_wait(self.step_async(actions, group))
+
+    def close(self) -> None:
+        if self._sock is None:
+            return
+        try:
+            send_message(self._sock, CLOSE, 0, self.group, self._next_id, b"")
+        except OSError:
+            pass
+        self._sock.close()
+        self._sock = None
+
+
+def get_args():
+    parse_args = argparse.ArgumentParser()
+
+    parse_args.add_argument(
+        "-a", "--address", type=str, default="unix:/tmp/pyboy_env_server.sock"
+    )
+
+    parse_args.add_argument("-d", "--domain", type=str, default="pokemon")
+
+    parse_args.add_argument("-t", "--task", type=str, default="brock")
+
+    parse_args.add_argument("-e", "--num_envs", type=int, default=8)
+
+    parse_args.add_argument("-g", "--num_groups", type=int, default=1)
+
+    parse_args.add_argument("--act_freq", type=int, default=24)
+
+    parse_args.add_argument("--profile", type=str, default="train")
+
+    # e.g. "uint8" for PokemonBrock - passed to the task class when set
+    parse_args.add_argument("--observation_mode", type=str, default=None)
+
+    parse_args.add_argument("--compress_level", type=int, default=1)
+
+    return parse_args.parse_args()
+
+
+def main():
+    args = get_args()
+
+    env_kwargs = {}
+    if args.observation_mode is not None:
+        env_kwargs["observation_mode"] = args.observation_mode
+
+    server = EnvServer.make(
+        args.address,
+        args.domain,
+        args.task,
+        args.num_envs,
+        args.num_groups,
+        args.act_freq,
+        args.profile,
+        env_kwargs,
+        args.compress_level,
+    )
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
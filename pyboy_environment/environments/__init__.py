@@ -1,3 +1,17 @@
-from .pyboy_environment import PyboyEnvironment
-from .mario import MarioEnvironment
-from .pokemon import PokemonEnvironment
+from importlib import import_module
+
+# Environment classes are resolved on first access so importing one domain does
+# not pull in the others
+_exports = {
+    "PyboyEnvironment": "pyboy_environment.environments.pyboy_environment",
+    "MarioEnvironment": "pyboy_environment.environments.mario",
+    "PokemonEnvironment": "pyboy_environment.environments.pokemon",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    if name in _exports:
+        return getattr(import_module(_exports[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,110 @@
+"""
+Action macros compiled into tick schedules.
+
+A macro is a list of ("press", button), ("release", button), ("tap", button, ticks)
+and ("wait", ticks) events. Compiling folds it into (inputs, ticks, render) entries,
+so executing an action is a handful of send_input calls and bulk pyboy.tick calls
+with only the final frame rendered.
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+from pyboy.utils import WindowEvent
+
+BUTTONS = {
+    "down": (WindowEvent.PRESS_ARROW_DOWN, WindowEvent.RELEASE_ARROW_DOWN),
+    "left": (WindowEvent.PRESS_ARROW_LEFT, WindowEvent.RELEASE_ARROW_LEFT),
+    "right": (WindowEvent.PRESS_ARROW_RIGHT, WindowEvent.RELEASE_ARROW_RIGHT),
+    "up": (WindowEvent.PRESS_ARROW_UP, WindowEvent.RELEASE_ARROW_UP),
+    "a": (WindowEvent.PRESS_BUTTON_A, WindowEvent.RELEASE_BUTTON_A),
+    "b": (WindowEvent.PRESS_BUTTON_B, WindowEvent.RELEASE_BUTTON_B),
+    "start": (WindowEvent.PRESS_BUTTON_START, WindowEvent.RELEASE_BUTTON_START),
+    "select": (WindowEvent.PRESS_BUTTON_SELECT, WindowEvent.RELEASE_BUTTON_SELECT),
+}
+
+# Walking one tile takes 16 frames, so holding the arrow for 8 and waiting covers it
+POKEMON_MACROS = {
+    "walk_down": [("tap", "down", 8), ("wait", 16)],
+    "walk_left": [("tap", "left", 8), ("wait", 16)],
+    "walk_right": [("tap", "right", 8), ("wait", 16)],
+    "walk_up": [("tap", "up", 8), ("wait", 16)],
+    "a_then_wait_text": [("tap", "a", 8), ("wait", 40)],
+    "b": [("tap", "b", 8), ("wait", 16)],
+    "fight_selected_move": [
+        ("tap", "a", 8),
+        ("wait", 24),
+        ("tap", "a", 8),
+        ("wait", 24),
+    ],
+}
+
+
+def compile_macro(macro: list[tuple]) -> tuple[tuple, ...]:
+    schedule = []
+    inputs = []
+
+    def wait(ticks: int) -> None:
+        nonlocal inputs
+        schedule.append((tuple(inputs), ticks, False))
+        inputs = []
+
+    for event in macro:
+        kind = event[0]
+        if kind == "press":
+            inputs.append(BUTTONS[event[1]][0])
+        elif kind == "release":
+            inputs.append(BUTTONS[event[1]][1])
+        elif kind == "tap":
+            inputs.append(BUTTONS[event[1]][0])
+            wait(event[2])
+            inputs.append(BUTTONS[event[1]][1])
+        elif kind == "wait":
+            wait(event[1])
+        else:
+            raise ValueError(f"Unknown macro event: {kind}")
+
+    if inputs:
+        schedule.append((tuple(inputs), 0, False))
+
+    # Only the last emulated frame of an action needs rendering for observations
+    for i in range(len(schedule) - 1, -1, -1):
+        if schedule[i][1] > 0:
+            schedule[i] = (schedule[i][0], schedule[i][1], True)
+            break
+
+    return tuple(schedule)
+
+
+class ActionTable:
+    def __init__(self, macros: dict[str, list[tuple]]) -> None:
+        self.names = list(macros)
+        self.schedules = [compile_macro(macro) for macro in macros.values()]
+        self.ticks = [
+            sum(ticks for _, ticks, _ in schedule) for schedule in self.schedules
+        ]
+        self._bins = np.linspace(0, 1, len(self.names) + 1).tolist()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def index(self, action) -> int:
+        # Integer actions index the table, continuous ones in [0, 1] are binned
+        if isinstance(action, (int, np.integer)):
+            if not 0 <= action < len(self.names):
+                raise ValueError(
+                    f"Action {action} out of range for {len(self.names)} actions"
+                )
+            return int(action)
+        action = min(max(float(action), 0.0), 0.99)
+        return bisect_right(self._bins, action) - 1
+
+    def execute(self, pyboy, action, render: bool = True) -> int:
+        # render=False skips rendering even the last frame of the action
+        index = self.index(action)
+        for inputs, ticks, render_last in self.schedules[index]:
+            for event in inputs:
+                pyboy.send_input(event)
+            if ticks:
+                pyboy.tick(ticks, render and render_last)
+        return self.ticks[index]
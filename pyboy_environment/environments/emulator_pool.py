@@ -0,0 +1,49 @@
+"""
+Process-local pool of initialised PyBoy emulators.
+
+Loading the ROM dominates environment construction, so emulators released by a
+closed environment are kept alive and handed to the next environment asking for
+the same (rom, emulator profile) combination. The environment then only has to
+load its task init state.
+"""
+
+from collections import defaultdict
+
+from pyboy import PyBoy
+
+from pyboy_environment.environments.emulator_profiles import (
+    EmulatorProfile,
+    create_emulator,
+)
+
+
+class EmulatorPool:
+    def __init__(self) -> None:
+        self._idle: dict[tuple, list[PyBoy]] = defaultdict(list)
+
+    def acquire(self, rom_path: str, profile: EmulatorProfile) -> PyBoy:
+        key = (rom_path, profile)
+
+        if self._idle[key]:
+            return self._idle[key].pop()
+
+        return create_emulator(rom_path, profile)
+
+    def release(self, rom_path: str, profile: EmulatorProfile, pyboy: PyBoy) -> None:
+        self._idle[(rom_path, profile)].append(pyboy)
+
+    def idle_count(self) -> int:
+        return sum(len(emulators) for emulators in self._idle.values())
+
+    def clear(self) -> None:
+        for emulators in self._idle.values():
+            for pyboy in emulators:
+                pyboy.stop(save=False)
+        self._idle.clear()
+
+
+_pool = EmulatorPool()
+
+
+def get_pool() -> EmulatorPool:
+    return _pool
@@ -0,0 +1,69 @@
+"""
+Named PyBoy configurations applied together when an emulator is created.
+
+    train - no window, no sound, errors only, unlimited speed, frames not rendered
+    eval  - as train but warnings are logged, for headless evaluation runs
+    debug - SDL2 window at real-time speed with sound, every frame rendered
+
+Environments built with the legacy headless/emulation_speed arguments instead get
+PyBoy's own defaults (scale 3, no sound, errors only) with only the window chosen.
+
+Only keyword arguments PyBoy 2.2 accepts are passed to the constructor. render is
+used by the environments as the render argument of pyboy.tick() - skipping frame
+rendering leaves memory and tilemaps up to date but pyboy.screen stale.
+"""
+
+from typing import NamedTuple
+
+from pyboy import PyBoy
+
+
+class EmulatorProfile(NamedTuple):
+    name: str
+    window: str
+    scale: int
+    sound: bool
+    sound_emulated: bool
+    log_level: str
+    render: bool
+    emulation_speed: int
+
+    def pyboy_kwargs(self) -> dict[str, any]:
+        return {
+            "window": self.window,
+            "scale": self.scale,
+            "sound": self.sound,
+            "sound_emulated": self.sound_emulated,
+            "log_level": self.log_level,
+        }
+
+
+PROFILES = {
+    "train": EmulatorProfile("train", "null", 1, False, False, "ERROR", False, 0),
+    "eval": EmulatorProfile("eval", "null", 1, False, False, "WARNING", False, 0),
+    "debug": EmulatorProfile("debug", "SDL2", 3, True, True, "INFO", True, 1),
+}
+
+
+def get_profile(profile) -> EmulatorProfile:
+    if isinstance(profile, EmulatorProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown emulator profile: {profile}")
+    return PROFILES[profile]
+
+
+# What PyBoy(rom, window=...) gave before profiles existed
+LEGACY_PROFILE = EmulatorProfile("legacy", "SDL2", 3, False, False, "ERROR", True, 0)
+
+
+def profile_for(headless: bool, emulation_speed: int) -> EmulatorProfile:
+    return LEGACY_PROFILE._replace(
+        window="null" if headless else "SDL2", emulation_speed=emulation_speed
+    )
+
+
+def create_emulator(rom_path: str, profile: EmulatorProfile) -> PyBoy:
+    pyboy = PyBoy(rom_path, **profile.pyboy_kwargs())
+    pyboy.set_emulation_speed(profile.emulation_speed)
+    return pyboy
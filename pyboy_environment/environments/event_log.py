@@ -0,0 +1,130 @@
+"""
+Structured event sink for reward and task code.
+
+emit() always bumps a per-event-type counter; whether the event is also stored is
+decided by per-type sampling (keep every Nth) and rate limiting (at most M per
+second). Stored events go into a fixed size numpy structured ring buffer, so the
+hot path is a couple of dict lookups and one record assignment - no formatting and
+no stdout writes. Pending records can be flushed to a binary file and read back
+with load_events, or inspected in memory through records() and summary().
+"""
+
+import json
+import logging
+import time
+
+import numpy as np
+
+MAX_EVENT_VALUES = 3
+
+EVENT_DTYPE = np.dtype(
+    [
+        ("time", np.float64),
+        ("step", np.int64),
+        ("type", np.uint16),
+        ("values", np.float32, (MAX_EVENT_VALUES,)),
+    ]
+)
+
+
+class EventLog:
+    def __init__(
+        self,
+        capacity: int = 4096,
+        sample_every: dict[str, int] = None,
+        max_per_second: float = None,
+        echo: bool = False,
+    ) -> None:
+        self.capacity = capacity
+        self.sample_every = {} if sample_every is None else sample_every
+        self.max_per_second = max_per_second
+        # Stored events are also written to the debug log when echo is set
+        self.echo = echo
+
+        self._records = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self._head = 0
+        self._flushed = 0
+
+        self.names: list[str] = []
+        self._types: dict[str, int] = {}
+        self.counts: dict[str, int] = {}
+        self.recorded: dict[str, int] = {}
+        self._windows: dict[str, list] = {}
+
+    def _type(self, name: str) -> int:
+        if name not in self._types:
+            self._types[name] = len(self.names)
+            self.names.append(name)
+            self.counts[name] = 0
+            self.recorded[name] = 0
+        return self._types[name]
+
+    def _rate_limited(self, name: str, now: float) -> bool:
+        window = self._windows.setdefault(name, [now, 0])
+        if now - window[0] >= 1.0:
+            window[0], window[1] = now, 0
+        window[1] += 1
+        return window[1] > self.max_per_second
+
+    def emit(self, name: str, *values: float, step: int = 0) -> None:
+        event_type = self._type(name)
+        self.counts[name] += 1
+
+        if (self.counts[name] - 1) % self.sample_every.get(name, 1):
+            return
+
+        now = time.time()
+        if self.max_per_second is not None and self._rate_limited(name, now):
+            return
+
+        values = (values + (0,) * MAX_EVENT_VALUES)[:MAX_EVENT_VALUES]
+        self._records[self._head % self.capacity] = (now, step, event_type, values)
+
+        self._head += 1
+        self.recorded[name] += 1
+
+        if self.echo:
+            logging.debug(f"{name}: {values}")
+
+    def records(self) -> np.ndarray:
+        # Stored events still in the ring, oldest first
+        start = max(0, self._head - self.capacity)
+        index = np.arange(start, self._head) % self.capacity
+        return self._records[index]
+
+    def summary(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {
+                "count": self.counts[name],
+                "recorded": self.recorded[name],
+                "dropped": self.counts[name] - self.recorded[name],
+            }
+            for name in self.names
+        }
+
+    def flush(self, path: str) -> int:
+        # Appends records stored since the last flush - older ones overwritten in the
+        # ring before a flush are lost, so flush at least every capacity events
+        start = max(self._flushed, self._head - self.capacity)
+        index = np.arange(start, self._head) % self.capacity
+        with open(path, "ab") as f:
+            self._records[index].tofile(f)
+        self._flushed = self._head
+
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump({"names": self.names, "summary": self.summary()}, f, indent=4)
+        return len(index)
+
+    def clear(self) -> None:
+        self._head = 0
+        self._flushed = 0
+        for name in self.names:
+            self.counts[name] = 0
+            self.recorded[name] = 0
+        self._windows.clear()
+
+
+def load_events(path: str) -> tuple[np.ndarray, list[str]]:
+    with open(f"{path}.json", "r", encoding="utf-8") as f:
+        names = json.load(f)["names"]
+    return np.fromfile(path, dtype=EVENT_DTYPE), names
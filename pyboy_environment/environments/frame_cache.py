@@ -0,0 +1,31 @@
+"""
+Base for decoders that read emulator memory once per emulated frame.
+
+decode() returns the cached result until pyboy.frame_count moves on, so the reward,
+done and observation code can all ask for the same values within a step for free.
+Loading a state does not advance the frame count, so invalidate() must be called
+after one.
+"""
+
+from abc import ABCMeta, abstractmethod
+
+
+class FrameCachedDecoder(metaclass=ABCMeta):
+    def __init__(self, pyboy) -> None:
+        self.pyboy = pyboy
+        self._frame = -1
+        self._decoded = None
+
+    def invalidate(self) -> None:
+        self._frame = -1
+
+    def decode(self):
+        frame = self.pyboy.frame_count
+        if frame != self._frame:
+            self._decoded = self._decode()
+            self._frame = frame
+        return self._decoded
+
+    @abstractmethod
+    def _decode(self):
+        pass
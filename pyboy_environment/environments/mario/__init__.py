@@ -1 +1 @@
-from .mario_environment import MarioEnvironment
+from .mario_environment import MarioEnvironment, get_batched_states
@@ -13,6 +13,7 @@ from abc import ABCMeta
 import numpy as np
 from pyboy.utils import WindowEvent
 
+from pyboy_environment.environments.mario.mario_stats import MarioStatsDecoder
 from pyboy_environment.environments.pyboy_environment import PyboyEnvironment
 
 
@@ -24,7 +25,11 @@ class MarioEnvironment(PyboyEnvironment, metaclass=ABCMeta):
         release_button: list[WindowEvent],
         emulation_speed: int = 0,
         headless: bool = False,
+        profile: str = None,
+        reuse_observation: bool = False,
     ) -> None:
+        # Opt-in: _get_state() overwrites one buffer each step instead of allocating
+        self.reuse_observation = reuse_observation
 
         super().__init__(
             task="mario",
@@ -36,72 +41,87 @@ class MarioEnvironment(PyboyEnvironment, metaclass=ABCMeta):
             release_button=release_button,
             emulation_speed=emulation_speed,
             headless=headless,
+            profile=profile,
         )
 
+    def _configure_emulator(self) -> None:
+        mario = self.pyboy.game_wrapper
+        mario.game_area_mapping(mario.mapping_compressed, 0)
+        self._observation = None
+        self._stats_decoder = MarioStatsDecoder(self.pyboy)
+
+    def reset(self) -> np.ndarray:
+        self._stats_decoder.invalidate()
+        return super().reset()
+
+    def set_trajectory_writer(self, writer) -> None:
+        # A reused observation buffer would be overwritten before the chunk is written
+        if writer is not None and self.reuse_observation:
+            writer.copy_obs = True
+        super().set_trajectory_writer(writer)
+
     def _get_state(self) -> np.ndarray:
-        # TODO parameter as to whether to flatten this view or not
         # TODO image based being frame or game area frame...
-        return self.game_area().flatten().tolist()
+        game_area = self.game_area()
+        if not self.reuse_observation:
+            return game_area.astype(np.uint8).ravel()
+
+        if self._observation is None:
+            self._observation = np.empty(game_area.size, dtype=np.uint8)
+
+        # The observation buffer is reused each step - copy it if it must outlive the step
+        np.copyto(self._observation, game_area.reshape(-1), casting="unsafe")
+        return self._observation
 
     def _generate_game_stats(self) -> dict[str, int]:
-        return {
-            "lives": self._get_lives(),
-            "score": self._get_score(),
-            "coins": self._get_coins(),
-            "stage": self._get_stage(),
-            "world": self._get_world(),
-            "x_position": self._get_x_position(),
-            "time": self._get_time(),
-            "dead_timer": self._get_dead_timer(),
-            "dead_jump_timer": self._get_dead_jump_timer(),
-            "game_over": self._get_game_over(),
-        }
+        # Decoded once per tick and shared by the reward, done and truncation checks
+        return self._stats_decoder.decode()
 
     def _get_x_position(self):
-        # Copied from: https://github.com/lixado/PyBoy-RL/blob/main/AISettings/MarioAISettings.py
-        # Do not understand how this works...
-        level_block = self._read_m(0xC0AB)
-        mario_x = self._read_m(0xC202)
-        scx = self.pyboy.screen.tilemap_position_list[16][0]
-        real = (scx - 7) % 16 if (scx - 7) % 16 != 0 else 16
-        real_x_position = level_block * 16 + real + mario_x
-        return real_x_position
+        return self._stats_decoder.decode()["x_position"]
 
     def _get_time(self):
-        hundreds = self._read_m(0x9831)
-        tens = self._read_m(0x9832)
-        ones = self._read_m(0x9833)
-        return int(str(hundreds) + str(tens) + str(ones))
+        return self._stats_decoder.decode()["time"]
 
     def _get_lives(self):
-        return self._read_m(0xDA15)
+        return self._stats_decoder.decode()["lives"]
 
     def _get_score(self):
-        mario = self.pyboy.game_wrapper
-        return mario.score
+        return self._stats_decoder.decode()["score"]
 
     def _get_coins(self):
-        return self._read_m(0xFFFA)
+        return self._stats_decoder.decode()["coins"]
 
     def _get_stage(self):
-        return self._read_m(0x982E)
+        return self._stats_decoder.decode()["stage"]
 
     def _get_world(self):
-        return self._read_m(0x982C)
+        return self._stats_decoder.decode()["world"]
 
     def _get_game_over(self):
-        return self._read_m(0xFFB3) == 0x39
+        return self._stats_decoder.decode()["game_over"]
 
     def _get_mario_pose(self):
         return self._read_m(0xC203)
 
     def _get_dead_timer(self):
-        return self._read_m(0xFFA6)
+        return self._stats_decoder.decode()["dead_timer"]
 
     def _get_dead_jump_timer(self):
-        return self._read_m(0xC0AC)
+        return self._stats_decoder.decode()["dead_jump_timer"]
 
     def game_area(self) -> np.ndarray:
-        mario = self.pyboy.game_wrapper
-        mario.game_area_mapping(mario.mapping_compressed, 0)
-        return mario.game_area()
+        # Compressed mapping is set once in _configure_emulator
+        return self.pyboy.game_wrapper.game_area()
+
+
+def get_batched_states(
+    envs: list[MarioEnvironment], out: np.ndarray = None
+) -> np.ndarray:
+    # Gathers the game area of several workers into one (num_envs, obs_size) uint8 batch
+    if out is None:
+        out = np.empty((len(envs), envs[0].observation_space), dtype=np.uint8)
+
+    for i, env in enumerate(envs):
+        np.copyto(out[i], env.game_area().reshape(-1), casting="unsafe")
+    return out
@@ -14,6 +14,8 @@ class MarioRun(MarioEnvironment):
         act_freq: int,
         emulation_speed: int = 0,
         headless: bool = False,
+        profile: str = None,
+        reuse_observation: bool = False,
     ) -> None:
 
         valid_actions: List[WindowEvent] = [
@@ -40,6 +42,8 @@ class MarioRun(MarioEnvironment):
             release_button=release_button,
             emulation_speed=emulation_speed,
             headless=headless,
+            profile=profile,
+            reuse_observation=reuse_observation,
         )
 
         self.max_level_progress = 0
@@ -78,8 +82,7 @@ class MarioRun(MarioEnvironment):
             else:
                 self.pyboy.send_input(self.release_button[i])
 
-        for i in range(self.act_freq):
-            self.pyboy.tick()
+        self.pyboy.tick(self.act_freq, self.render_frames)
 
     def _calculate_reward(self, new_state: Dict[str, int]) -> float:
         reward_stats = {
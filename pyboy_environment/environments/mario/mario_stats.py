@@ -0,0 +1,50 @@
+"""
+Bulk decoder for the Super Mario Land game stats.
+
+https://datacrystal.tcrf.net/wiki/Super_Mario_Land/RAM_map
+
+The HUD tiles, level/Mario position bytes and the HRAM block are snapshotted with
+one slice read each per tick and decoded with integer math.
+
+The game resets SCX to 0 for the HUD in its VBlank handler and restores the level
+scroll for line 16 onwards. tick() returns once the frame reaches VBlank, before
+that handler runs, so rSCX still holds the scroll tilemap_position_list[16] reports.
+"""
+
+from pyboy_environment.environments.frame_cache import FrameCachedDecoder
+
+HUD_START = 0x982C  # world, -, stage, -, -, time hundreds, tens, ones
+HUD_END = 0x9834
+HRAM_START = 0xFFA6  # dead timer ... coins
+HRAM_END = 0xFFFB
+SCX = 0xFF43
+
+
+def _digit(tile: int) -> int:
+    # Blank HUD tiles read as zero
+    return tile if tile < 10 else 0
+
+
+class MarioStatsDecoder(FrameCachedDecoder):
+    def _decode(self) -> dict[str, int]:
+        memory = self.pyboy.memory
+        hud = memory[HUD_START:HUD_END]
+        level_block, dead_jump_timer = memory[0xC0AB:0xC0AD]
+        mario_x = memory[0xC202]
+        hram = memory[HRAM_START:HRAM_END]
+
+        # Copied from: https://github.com/lixado/PyBoy-RL/blob/main/AISettings/MarioAISettings.py
+        real = (memory[SCX] - 7) % 16 or 16
+
+        return {
+            "lives": memory[0xDA15],
+            "score": self.pyboy.game_wrapper.score,
+            "coins": hram[0xFFFA - HRAM_START],
+            "stage": hud[0x982E - HUD_START],
+            "world": hud[0x982C - HUD_START],
+            "x_position": level_block * 16 + real + mario_x,
+            "time": 100 * _digit(hud[5]) + 10 * _digit(hud[6]) + _digit(hud[7]),
+            "dead_timer": hram[0xFFA6 - HRAM_START],
+            "dead_jump_timer": dead_jump_timer,
+            "game_over": hram[0xFFB3 - HRAM_START] == 0x39,
+        }
@@ -0,0 +1,283 @@
+"""
+Environment metrics in shared numpy counters with a Prometheus/JSON collector.
+
+Counters live in one SharedMemory float64 table with a row per worker. Each worker
+only writes its own row, so updates are plain array stores with no locks. A
+collector process attaches to the table and serves it as Prometheus text on
+localhost (one series per worker, aggregated by the query) and/or rewrites a JSON
+file with the rows and their totals at a fixed interval.
+
+Throughput comes in three forms: worker_steps_per_sec is the average rate of one
+worker while stepping, farm_steps_per_sec sums the per-worker rates, and
+wall_steps_per_sec is the step count change over wall time since the previous
+snapshot (0 on the first one).
+"""
+
+import json
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+
+# Cumulative counters, except max_badges and last_update which are gauges
+METRIC_FIELDS = (
+    "steps",
+    "resets",
+    "episodes",
+    "ticks",
+    "step_seconds",
+    "reset_seconds",
+    "dialog_steps",
+    "reward_total",
+    "max_badges",
+    "last_update",
+)
+FIELD_INDEX = {name: i for i, name in enumerate(METRIC_FIELDS)}
+STEPS, RESETS, EPISODES, TICKS = 0, 1, 2, 3
+STEP_SECONDS, RESET_SECONDS, DIALOG_STEPS, REWARD_TOTAL = 4, 5, 6, 7
+MAX_BADGES, LAST_UPDATE = 8, 9
+
+
+class MetricsSpec(NamedTuple):
+    name: str
+    num_workers: int
+
+
+class MetricsTable:
+    def __init__(self, spec: MetricsSpec, create: bool = False) -> None:
+        self.spec = spec
+        shape = (spec.num_workers, len(METRIC_FIELDS))
+        size = int(np.prod(shape)) * np.dtype(np.float64).itemsize
+
+        if create:
+            self._shm = shared_memory.SharedMemory(
+                name=spec.name, create=True, size=size
+            )
+        else:
+            self._shm = shared_memory.SharedMemory(name=spec.name)
+
+        self.counters = np.ndarray(shape, dtype=np.float64, buffer=self._shm.buf)
+        if create:
+            self.counters[:] = 0
+
+        # (time, steps) of the previous snapshot - the HTTP handler and the JSON
+        # writer take snapshots from different threads
+        self._last_snapshot = None
+        self._snapshot_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, num_workers: int, name: str = None) -> "MetricsTable":
+        name = f"pyboy_metrics_{mp.current_process().pid}" if name is None else name
+        return cls(MetricsSpec(name, num_workers), create=True)
+
+    @classmethod
+    def attach(cls, spec: MetricsSpec) -> "MetricsTable":
+        return cls(spec, create=False)
+
+    def snapshot(self) -> dict[str, any]:
+        now = time.time()
+        counters = self.counters.copy()
+        totals = counters.sum(axis=0)
+        totals[MAX_BADGES] = counters[:, MAX_BADGES].max()
+        totals[LAST_UPDATE] = counters[:, LAST_UPDATE].max()
+
+        worker_rates = counters[:, STEPS] / np.maximum(counters[:, STEP_SECONDS], 1e-9)
+
+        totals = dict(zip(METRIC_FIELDS, totals.tolist()))
+        totals["worker_steps_per_sec"] = totals["steps"] / max(
+            totals["step_seconds"], 1e-9
+        )
+        totals["farm_steps_per_sec"] = float(worker_rates.sum())
+
+        with self._snapshot_lock:
+            last, self._last_snapshot = self._last_snapshot, (now, totals["steps"])
+        if last is None or now <= last[0]:
+            totals["wall_steps_per_sec"] = 0.0
+        else:
+            totals["wall_steps_per_sec"] = (totals["steps"] - last[1]) / (now - last[0])
+
+        totals["mean_reset_seconds"] = totals["reset_seconds"] / max(
+            totals["resets"], 1
+        )
+        totals["dialog_fraction"] = totals["dialog_steps"] / max(totals["steps"], 1)
+
+        workers = [dict(zip(METRIC_FIELDS, row)) for row in counters.tolist()]
+        for worker, rate in zip(workers, worker_rates.tolist()):
+            worker["steps_per_sec"] = rate
+        return {"time": now, "totals": totals, "workers": workers}
+
+    def close(self) -> None:
+        # Views into the segment must be dropped before it can be closed
+        self.counters = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+
+class EnvMetrics:
+    def __init__(self, table: MetricsTable, worker_id: int) -> None:
+        self.table = table
+        self.row = table.counters[worker_id]
+
+    def record_step(
+        self,
+        seconds: float,
+        ticks: int,
+        reward: float,
+        done: bool,
+        truncated: bool,
+        game_stats: dict,
+        dialog: bool = False,
+    ) -> None:
+        row = self.row
+        row[STEPS] += 1
+        row[TICKS] += ticks
+        row[STEP_SECONDS] += seconds
+        row[REWARD_TOTAL] += reward
+        row[DIALOG_STEPS] += dialog
+        row[EPISODES] += done or truncated
+        row[MAX_BADGES] = max(row[MAX_BADGES], game_stats.get("badges", 0))
+        row[LAST_UPDATE] = time.time()
+
+    def record_reset(self, seconds: float) -> None:
+        self.row[RESETS] += 1
+        self.row[RESET_SECONDS] += seconds
+        self.row[LAST_UPDATE] = time.time()
+
+    def close(self) -> None:
+        self.row = None
+        self.table.close()
+
+
+# Monotonic per-worker fields - reward_total can fall (penalties) so it is a gauge
+PROMETHEUS_COUNTERS = (
+    "steps",
+    "resets",
+    "episodes",
+    "ticks",
+    "step_seconds",
+    "reset_seconds",
+    "dialog_steps",
+)
+
+
+def prometheus_text(snapshot: dict, prefix: str = "pyboy_env") -> str:
+    # Raw fields are only exported per worker - sum() them in Prometheus. The
+    # derived totals (rates, fractions) get their own unlabeled gauges
+    lines = []
+    for name in METRIC_FIELDS:
+        if name in PROMETHEUS_COUNTERS:
+            metric, kind = f"{prefix}_{name}_total", "counter"
+        elif name == "reward_total":
+            metric, kind = f"{prefix}_cumulative_reward", "gauge"
+        else:
+            metric, kind = f"{prefix}_{name}", "gauge"
+        lines.append(f"# TYPE {metric} {kind}")
+        for worker, row in enumerate(snapshot["workers"]):
+            lines.append(f'{metric}{{worker="{worker}"}} {row[name]}')
+
+    for name, value in snapshot["totals"].items():
+        if name not in FIELD_INDEX:
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsCollector:
+    def __init__(
+        self,
+        spec: MetricsSpec,
+        port: int = None,
+        json_path: str = None,
+        interval: float = 10.0,
+    ) -> None:
+        self.table = MetricsTable.attach(spec)
+        self.port = port
+        self.json_path = json_path
+        self.interval = interval
+        self._server = None
+
+    def _handler(self) -> type:
+        table = self.table
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = prometheus_text(table.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+    def serve(self) -> None:
+        # Bound to localhost only - scrape through a tunnel or sidecar if needed
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logging.info(f"Serving metrics on http://127.0.0.1:{self.port}/metrics")
+
+    def write_json(self) -> None:
+        # Written to a temporary file and renamed so readers never see partial JSON
+        temp_path = f"{self.json_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.table.snapshot(), f, indent=4)
+        os.replace(temp_path, self.json_path)
+
+    def run(self, stop_event=None) -> None:
+        if self.port is not None:
+            self.serve()
+        try:
+            while True:
+                if self.json_path is not None:
+                    self.write_json()
+                if stop_event is None:
+                    time.sleep(self.interval)
+                elif stop_event.wait(self.interval):
+                    break
+        finally:
+            if self.json_path is not None:
+                self.write_json()
+            self.close()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+        self.table.close()
+
+
+def run_collector(
+    spec: MetricsSpec, port: int, json_path: str, interval: float, stop_event
+) -> None:
+    MetricsCollector(spec, port, json_path, interval).run(stop_event)
+
+
+def start_collector(
+    spec: MetricsSpec,
+    port: int = None,
+    json_path: str = None,
+    interval: float = 10.0,
+) -> tuple:
+    # Returns (process, stop_event) - set the event to write a final JSON and exit
+    stop_event = mp.Event()
+    process = mp.Process(
+        target=run_collector,
+        args=(spec, port, json_path, interval, stop_event),
+        daemon=True,
+    )
+    process.start()
+    return process, stop_event
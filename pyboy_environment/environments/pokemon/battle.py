@@ -0,0 +1,77 @@
+"""
+Bulk decoder for the pokered battle state.
+
+https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/ram/wram.asm
+
+The enemy battle mon (wEnemyMon), the player's active mon (wBattleMon), wIsInBattle
+and wBattleType all sit in 0xCFE5-0xD05A, so the whole region is snapshotted with
+one slice read and decoded into NamedTuples. HP and max HP are 16-bit big-endian.
+"""
+
+from typing import NamedTuple
+
+from pyboy_environment.environments.frame_cache import FrameCachedDecoder
+
+BATTLE_START, BATTLE_END = 0xCFE5, 0xD05B
+ENEMY_MON = 0xCFE5 - BATTLE_START
+PLAYER_MON = 0xD014 - BATTLE_START
+IS_IN_BATTLE = 0xD057 - BATTLE_START
+BATTLE_TYPE = 0xD05A - BATTLE_START
+
+# wIsInBattle values
+NOT_IN_BATTLE, WILD_BATTLE, TRAINER_BATTLE, LOST_BATTLE = 0, 1, 2, 0xFF
+
+
+class BattleMon(NamedTuple):
+    species: int
+    hp: int
+    max_hp: int
+    level: int
+    status: int
+    types: tuple[int, int]
+    moves: tuple[int, int, int, int]
+    pp: tuple[int, int, int, int]
+
+    @property
+    def hp_fraction(self) -> float:
+        return self.hp / self.max_hp if self.max_hp else 0.0
+
+
+class BattleState(NamedTuple):
+    # wIsInBattle: 0 none, 1 wild, 2 trainer, 0xFF lost
+    kind: int
+    # wBattleType: 0 normal, 1 old man tutorial, 2 safari zone
+    battle_type: int
+    enemy: BattleMon
+    player: BattleMon
+
+    @property
+    def in_battle(self) -> bool:
+        return self.kind != NOT_IN_BATTLE
+
+
+def _decode_mon(region, offset: int) -> BattleMon:
+    # battle_struct: species, hp(2), party pos, status, type1, type2, catch rate,
+    # moves(4), dvs(2), level, max hp(2), attack..special(8), pp(4)
+    mon = region[offset : offset + 0x1D]
+    return BattleMon(
+        species=mon[0],
+        hp=mon[1] << 8 | mon[2],
+        max_hp=mon[15] << 8 | mon[16],
+        level=mon[14],
+        status=mon[4],
+        types=(mon[5], mon[6]),
+        moves=tuple(mon[8:12]),
+        pp=tuple(pp & 0x3F for pp in mon[25:29]),
+    )
+
+
+class BattleDecoder(FrameCachedDecoder):
+    def _decode(self) -> BattleState:
+        region = self.pyboy.memory[BATTLE_START:BATTLE_END]
+        return BattleState(
+            kind=region[IS_IN_BATTLE],
+            battle_type=region[BATTLE_TYPE],
+            enemy=_decode_mon(region, ENEMY_MON),
+            player=_decode_mon(region, PLAYER_MON),
+        )
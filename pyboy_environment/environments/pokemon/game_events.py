@@ -0,0 +1,115 @@
+"""
+Game event detection for pokered, through execution hooks or RAM changes.
+
+When a symbol file sits next to the ROM (PokemonRed.sym from the pokered build,
+loaded by PyBoy), events are hooked on the routines that raise them. Hooks fire
+the moment the CPU enters a routine, so events part way through an action are never
+missed. Without the symbol file, or for events that have no single routine, the
+event is detected from the WRAM bytes it changes through the environment's
+RamWatcher instead. Those events are reported once per step with the frame count at
+the end of the step.
+
+https://github.com/pret/pokered/tree/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e
+"""
+
+import logging
+
+import numpy as np
+
+from pyboy_environment.environments.ram_watch import RamChange, RamWatcher
+
+# event name -> candidate routine labels, the first one that resolves is hooked
+POKERED_EVENT_HOOKS = {
+    "battle_start": ["InitBattle"],
+    "wild_encounter": ["InitWildBattle"],
+    "catch_pokemon": ["ItemUseBall.captured"],
+    "gain_xp": ["GainExperience"],
+    "map_load": ["LoadMapHeader"],
+}
+
+PARTY_XP, PARTY_STRIDE = 0xD179, 0x2C
+
+
+def _gained_bits(change: RamChange) -> bool:
+    return bool(np.any(change.new & ~change.old))
+
+
+def _xp_changed(change: RamChange) -> bool:
+    # The watched range spans the whole party - only the 3 byte XP fields count
+    return bool(np.any((change.addresses - PARTY_XP) % PARTY_STRIDE < 3))
+
+
+# event name -> (start, end, change test) over WRAM, used when no hook is registered
+POKERED_RAM_EVENTS = {
+    # wIsInBattle leaving 0, and becoming 1 for wild battles
+    "battle_start": (0xD057, 0xD058, lambda c: bool(c.old[0] == 0 and c.new[0])),
+    "wild_encounter": (0xD057, 0xD058, lambda c: bool(c.old[0] == 0 and c.new[0] == 1)),
+    # wPokedexOwned
+    "catch_pokemon": (0xD2F7, 0xD30A, _gained_bits),
+    "gain_xp": (PARTY_XP, PARTY_XP + 5 * PARTY_STRIDE + 3, _xp_changed),
+    # wCurMap
+    "map_load": (0xD35E, 0xD35F, lambda c: True),
+    # wObtainedBadges - any of the eight badge bits being set
+    "badge_award": (0xD356, 0xD357, _gained_bits),
+}
+
+
+class GameEventHooks:
+    def __init__(
+        self,
+        pyboy,
+        ram_watcher: RamWatcher = None,
+        hooks: dict[str, list[str]] = None,
+        ram_events: dict[str, tuple] = None,
+    ) -> None:
+        self.pyboy = pyboy
+        self.ram_watcher = ram_watcher
+        self.events: list[tuple[str, int]] = []
+        # event name -> routine label or "ram"
+        self.registered: dict[str, str] = {}
+
+        hooks = POKERED_EVENT_HOOKS if hooks is None else hooks
+        ram_events = POKERED_RAM_EVENTS if ram_events is None else ram_events
+
+        for name, symbols in hooks.items():
+            for symbol in symbols:
+                try:
+                    pyboy.hook_register(None, symbol, self._fire, name)
+                except ValueError:
+                    continue
+                self.registered[name] = symbol
+                break
+
+        for name, (start, end, test) in ram_events.items():
+            if name in self.registered or ram_watcher is None:
+                continue
+            ram_watcher.watch(
+                f"game_event:{name}", start, end, self._ram_callback(name, test)
+            )
+            self.registered[name] = "ram"
+
+        for name in set(hooks) | set(ram_events):
+            if name not in self.registered:
+                logging.warning(f"Game event {name} has no routine symbol or RAM watch")
+
+    def _fire(self, name: str) -> None:
+        self.events.append((name, self.pyboy.frame_count))
+
+    def _ram_callback(self, name: str, test):
+        def callback(change: RamChange) -> None:
+            if test(change):
+                self._fire(name)
+
+        return callback
+
+    def clear(self) -> None:
+        self.events = []
+
+    def close(self) -> None:
+        # Hooks live on the emulator, which outlives the environment in the pool
+        for name, symbol in self.registered.items():
+            if symbol == "ram":
+                self.ram_watcher.unwatch(f"game_event:{name}")
+            else:
+                self.pyboy.hook_deregister(None, symbol)
+        self.registered = {}
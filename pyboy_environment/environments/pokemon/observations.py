@@ -0,0 +1,27 @@
+"""
+Helpers for the compact observation modes of the Pokemon tasks.
+
+uint8 observations keep the frame as raw greyscale bytes next to a small float32
+stats array, a quarter of the float32 footprint in replay buffers. dequantise()
+rebuilds the flat float32 layout of the "float" mode (stats followed by the frame
+scaled to [0, 1]) only when a batch is sampled.
+"""
+
+import numpy as np
+
+SCALE = np.float32(1 / 255)
+
+
+def dequantise(frames: np.ndarray, stats: np.ndarray) -> np.ndarray:
+    frames = np.asarray(frames)
+    stats = np.asarray(stats, dtype=np.float32)
+    batch, stats_dim = stats.shape
+
+    out = np.empty((batch, stats_dim + frames[0].size), dtype=np.float32)
+    out[:, :stats_dim] = stats
+    np.multiply(frames.reshape(batch, -1), SCALE, out=out[:, stats_dim:])
+    return out
+
+
+def dequantise_observation(observation: dict[str, np.ndarray]) -> np.ndarray:
+    return dequantise(observation["frame"][None], observation["stats"][None])[0]
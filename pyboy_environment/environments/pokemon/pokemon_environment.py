@@ -1,12 +1,50 @@
 import random
+from bisect import bisect_right
 from functools import cached_property
 from abc import abstractmethod
 
 import numpy as np
 from pyboy.utils import WindowEvent
 
+from pyboy_environment.environments.action_macros import ActionTable
 from pyboy_environment.environments.pyboy_environment import PyboyEnvironment
+from pyboy_environment.environments.ram_watch import POPCOUNT
 from pyboy_environment.environments.pokemon import pokemon_constants as pkc
+from pyboy_environment.environments.pokemon.battle import BattleDecoder, BattleState
+from pyboy_environment.environments.pokemon.game_events import GameEventHooks
+from pyboy_environment.environments.pokemon.reward_engine import CompiledReward
+from pyboy_environment.environments.pokemon.tilemap import (
+    TEXT_BOX_CORNER,
+    TEXT_BOX_CORNER_TILE,
+    TILEMAP_END,
+    TILEMAP_START,
+    TileClassifier,
+)
+from pyboy_environment.environments.pokemon.world_map import (
+    CoverageMap,
+    load_world_map,
+)
+
+# https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/ram/wram.asm
+PARTY_START, PARTY_END = 0xD163, 0xD26B
+POKEDEX_START, POKEDEX_END = 0xD2F7, 0xD31D
+EVENT_FLAGS_START, EVENT_FLAGS_END = 0xD747, 0xD886
+
+# wTileMap (tilemap.TILEMAP_START) tiles that mark menus and scripted input
+MENU_CURSOR_TILE = 0xED
+JOY_IGNORE = 0xCD6B
+
+# A is held for a few ticks per press when fast forwarding text
+FAST_FORWARD_PRESS_TICKS = 4
+
+# Common (start, end) ranges for PyboyEnvironment.watch_ram - end is exclusive
+WATCH_RANGES = {
+    "enemy_hp": (0xCFE6, 0xCFE8),
+    "battle": (0xD057, 0xD058),
+    "map_id": (0xD35E, 0xD35F),
+    "location": (0xD361, 0xD363),
+    "badges": (0xD356, 0xD357),
+}
 
 
 class PokemonEnvironment(PyboyEnvironment):
@@ -18,8 +56,29 @@ class PokemonEnvironment(PyboyEnvironment):
         task: str,
         emulation_speed: int = 0,
         headless: bool = False,
+        profile: str = None,
         init_name: str = "has_pokedex.state",
+        fast_forward_dialog: bool = False,
+        max_fast_forward_ticks: int = 2048,
+        action_table: ActionTable = None,
+        game_events: bool = False,
     ) -> None:
+        self.reward_breakdown = None
+        # CompiledReward -> [stats dict, its features row, spare row]
+        self._reward_features = {}
+
+        # Macro actions replace the single button presses of valid_actions when set
+        self.action_table = action_table
+
+        # Advance text boxes and scripted sequences internally until the next decision
+        self.fast_forward_dialog = fast_forward_dialog
+        self.max_fast_forward_ticks = max_fast_forward_ticks
+
+        # Last raw snapshot and decoded values of the rarely changing RAM regions
+        self._region_cache: dict[str, tuple] = {}
+
+        self.game_events = None
+
         super().__init__(
             task=task,
             rom_name="PokemonRed.gb",
@@ -30,8 +89,13 @@ class PokemonEnvironment(PyboyEnvironment):
             valid_actions=valid_actions,
             release_button=release_button,
             headless=headless,
+            profile=profile,
         )
 
+        # Routine hooks / RAM watches reported each step through step_events
+        if game_events:
+            self.enable_game_events()
+
     @cached_property
     def min_action_value(self) -> float:
         return 0
@@ -42,7 +106,11 @@ class PokemonEnvironment(PyboyEnvironment):
 
     @cached_property
     def observation_space(self) -> int:
-        return len(self._get_state())
+        state = self._get_state()
+        # Compact observation modes report the size of their dequantised flat form
+        if isinstance(state, dict):
+            return sum(np.asarray(value).size for value in state.values())
+        return len(state)
 
     @cached_property
     def action_num(self) -> int:
@@ -53,48 +121,205 @@ class PokemonEnvironment(PyboyEnvironment):
     def sample_action(self) -> int:
         return random.uniform(0, 1)
 
+    def _configure_emulator(self) -> None:
+        self.tile_classifier = TileClassifier(self.pyboy)
+        self.battle_decoder = BattleDecoder(self.pyboy)
+
+        # Visit counts over global coordinates, kept across episodes until cleared
+        self.world_map = load_world_map(self.rom_path)
+        self.coverage = CoverageMap.for_world(self.world_map)
+
+    def enable_game_events(self, hooks: dict[str, list[str]] = None) -> None:
+        self.disable_game_events()
+        self.game_events = GameEventHooks(self.pyboy, self.ram_watcher, hooks)
+
+    def disable_game_events(self) -> None:
+        if self.game_events is not None:
+            self.game_events.close()
+            self.game_events = None
+
+    @property
+    def step_events(self) -> list[tuple[str, int]]:
+        # (event name, frame) pairs fired by hooks or RAM watches during the last step
+        if self.game_events is None:
+            return []
+        return self.game_events.events
+
+    @property
+    def battle_state(self) -> BattleState:
+        return self.battle_decoder.decode()
+
+    def reset(self) -> np.ndarray:
+        self.battle_decoder.invalidate()
+        if self.game_events is not None:
+            self.game_events.clear()
+        return super().reset()
+
+    def step(self, action) -> tuple:
+        if self.game_events is not None:
+            self.game_events.clear()
+        result = super().step(action)
+
+        location = self.prior_game_stats["location"]
+        self.coverage.update(location["global_x"], location["global_y"])
+        return result
+
+    def close(self) -> None:
+        self.disable_game_events()
+        super().close()
+
     def _get_state(self) -> np.ndarray:
         # Implement your state retrieval logic here - compact state based representation
         raise NotImplementedError(
             "Non-image based observation space not implemented - override this method to implement it"
         )
 
+    @cached_property
+    def _action_bins(self) -> list[float]:
+        return np.linspace(0, 1, len(self.valid_actions) + 1).tolist()
+
     def _run_action_on_emulator(self, action_array: np.ndarray) -> None:
-        action = action_array[0]
-        action = min(action, 0.99)
+        action = action_array[0] if np.ndim(action_array) else action_array
+
+        # Whether the agent acted inside a text box, for the dialog step metrics
+        self.step_info["dialog"] = self._is_text_box_open()
+
+        if self.action_table is not None:
+            self.action_table.execute(self.pyboy, action, self.render_frames)
+        else:
+            action = min(action, 0.99)
+
+            # Continuous Action is a float between 0 - 1 from Value based methods
+            # We need to convert this to an action that the emulator can understand
+            button = bisect_right(self._action_bins, action) - 1
+
+            # Push the button for a few frames
+            self.pyboy.send_input(self.valid_actions[button])
 
-        # Continuous Action is a float between 0 - 1 from Value based methods
-        # We need to convert this to an action that the emulator can understand
-        bins = np.linspace(0, 1, len(self.valid_actions) + 1)
-        button = np.digitize(action, bins) - 1
+            self.pyboy.tick(self.act_freq, self.render_frames)
 
-        # Push the button for a few frames
-        self.pyboy.send_input(self.valid_actions[button])
+            # Release the button
+            self.pyboy.send_input(self.release_button[button])
 
-        for _ in range(self.act_freq):
-            self.pyboy.tick()
+        if self.fast_forward_dialog:
+            self.step_info["skipped_ticks"] = self._fast_forward_dialog()
+            self.step_info["dialog"] |= self.step_info["skipped_ticks"] > 0
 
-        # Release the button
-        self.pyboy.send_input(self.release_button[button])
+    def _is_text_box_open(self) -> bool:
+        return self._read_m(TILEMAP_START + TEXT_BOX_CORNER) == TEXT_BOX_CORNER_TILE
+
+    def _is_non_interactive(self) -> bool:
+        tilemap = self.pyboy.memory[TILEMAP_START:TILEMAP_END]
+
+        # A menu cursor means the agent has a choice to make (menus, battle, yes/no)
+        if MENU_CURSOR_TILE in tilemap:
+            return False
+
+        text_box = tilemap[TEXT_BOX_CORNER] == TEXT_BOX_CORNER_TILE
+        scripted = self._read_m(JOY_IGNORE) != 0
+        return text_box or scripted
+
+    def _fast_forward_dialog(self) -> int:
+        skipped = 0
+        while skipped < self.max_fast_forward_ticks and self._is_non_interactive():
+            self.pyboy.send_input(WindowEvent.PRESS_BUTTON_A)
+            self.pyboy.tick(FAST_FORWARD_PRESS_TICKS, False)
+            self.pyboy.send_input(WindowEvent.RELEASE_BUTTON_A)
+            self.pyboy.tick(self.act_freq, self.render_frames)
+            skipped += FAST_FORWARD_PRESS_TICKS + self.act_freq
+        return skipped
 
     def _generate_game_stats(self) -> dict[str, any]:
+        # Party, pokedex and event regions are only re-decoded when their bytes change
+        party = self._decode_party_region()
+        caught, seen = self._decode_pokedex_region()
+        events, event_count = self._decode_event_region()
+
         return {
             "location": self._get_location(),
+            "party_size": party["party_size"],
+            "ids": party["ids"],
+            "pokemon": party["pokemon"],
+            "levels": party["levels"],
+            "type_id": party["type_id"],
+            "type": party["type"],
+            "hp": party["hp"],
+            "xp": party["xp"],
+            "xp_total": party["xp_total"],
+            "status": party["status"],
+            "badges": self._get_badge_count(),
+            "caught_pokemon": caught,
+            "seen_pokemon": seen,
+            "money": self._read_money(),
+            "events": events,
+            "event_count": event_count,
+        }
+
+    def _snapshot_region(self, name: str, start: int, end: int) -> tuple:
+        # Returns (snapshot, previous cache entry or None if the region changed)
+        snapshot = bytes(self.pyboy.memory[start:end])
+        cached = self._region_cache.get(name)
+        if cached is not None and cached[0] == snapshot:
+            return snapshot, cached
+        return snapshot, None
+
+    def _decode_party_region(self) -> dict[str, any]:
+        snapshot, cached = self._snapshot_region("party", PARTY_START, PARTY_END)
+        if cached is not None:
+            return cached[1]
+
+        ids = self._read_party_id()
+        type_ids = self._read_party_type()
+        xp = self._read_party_xp()
+        party = {
             "party_size": self._get_party_size(),
-            "ids": self._read_party_id(),
-            "pokemon": [pkc.get_pokemon(id) for id in self._read_party_id()],
+            "ids": ids,
+            "pokemon": [pkc.get_pokemon(id) for id in ids],
             "levels": self._read_party_level(),
-            "type_id": self._read_party_type(),
-            "type": [pkc.get_type(id) for id in self._read_party_type()],
+            "type_id": type_ids,
+            "type": [pkc.get_type(id) for id in type_ids],
             "hp": self._read_party_hp(),
-            "xp": self._read_party_xp(),
+            "xp": xp,
+            "xp_total": sum(xp),
             "status": self._read_party_status(),
-            "badges": self._get_badge_count(),
-            "caught_pokemon": self._read_caught_pokemon_count(),
-            "seen_pokemon": self._read_seen_pokemon_count(),
-            "money": self._read_money(),
-            "events": self._read_events(),
         }
+        self._region_cache["party"] = (snapshot, party)
+        return party
+
+    def _decode_pokedex_region(self) -> tuple[int, int]:
+        snapshot, cached = self._snapshot_region("pokedex", POKEDEX_START, POKEDEX_END)
+        if cached is not None:
+            return cached[1]
+
+        bits = POPCOUNT[np.frombuffer(snapshot, dtype=np.uint8)]
+        split = 0xD30A - POKEDEX_START
+        counts = (int(bits[:split].sum()), int(bits[split:].sum()))
+        self._region_cache["pokedex"] = (snapshot, counts)
+        return counts
+
+    def _decode_event_region(self) -> tuple[list[int], int]:
+        snapshot, cached = self._snapshot_region(
+            "events", EVENT_FLAGS_START, EVENT_FLAGS_END
+        )
+        if cached is not None:
+            return cached[1]
+
+        new_bytes = np.frombuffer(snapshot, dtype=np.uint8)
+        previous = self._region_cache.get("events")
+        if previous is None:
+            events = POPCOUNT[new_bytes].tolist()
+            event_count = sum(events)
+        else:
+            # Only the flag bytes that differ are re-counted and the total adjusted
+            old_bytes = np.frombuffer(previous[0], dtype=np.uint8)
+            events, event_count = list(previous[1][0]), previous[1][1]
+            for i in np.flatnonzero(new_bytes != old_bytes):
+                count = int(POPCOUNT[new_bytes[i]])
+                event_count += count - events[i]
+                events[i] = count
+
+        self._region_cache["events"] = (snapshot, (events, event_count))
+        return events, event_count
 
     @abstractmethod
     def _calculate_reward(self, new_state: dict) -> float:
@@ -113,10 +338,13 @@ class PokemonEnvironment(PyboyEnvironment):
         x_pos = self._read_m(0xD362)
         y_pos = self._read_m(0xD361)
         map_n = self._read_m(0xD35E)
+        global_x, global_y = self.world_map.to_global(map_n, x_pos, y_pos)
 
         return {
             "x": x_pos,
             "y": y_pos,
+            "global_x": int(global_x),
+            "global_y": int(global_y),
             "map_id": map_n,
             "map": pkc.get_map_location(map_n),
         }
@@ -216,13 +444,11 @@ class PokemonEnvironment(PyboyEnvironment):
         )
 
     def _read_events(self) -> list[int]:
-        event_flags_start = 0xD747
-        event_flags_end = 0xD886
         # museum_ticket = (0xD754, 0)
         # base_event_flags = 13
         return [
             self._bit_count(self._read_m(i))
-            for i in range(event_flags_start, event_flags_end)
+            for i in range(EVENT_FLAGS_START, EVENT_FLAGS_END)
         ]
 
     def _get_screen_background_tilemap(self):
@@ -283,7 +509,7 @@ class PokemonEnvironment(PyboyEnvironment):
         )
 
     def _xp_reward(self, new_state: dict[str, any]) -> int:
-        return sum(new_state["xp"]) - sum(self.prior_game_stats["xp"])
+        return new_state["xp_total"] - self.prior_game_stats["xp_total"]
 
     def _levels_reward(self, new_state: dict[str, any]) -> int:
         return sum(new_state["levels"]) - sum(self.prior_game_stats["levels"])
@@ -295,4 +521,26 @@ class PokemonEnvironment(PyboyEnvironment):
         return new_state["money"] - self.prior_game_stats["money"]
 
     def _event_reward(self, new_state: dict[str, any]) -> int:
-        return sum(new_state["events"]) - sum(self.prior_game_stats["events"])
+        return new_state["event_count"] - self.prior_game_stats["event_count"]
+
+    def _compiled_reward(
+        self, reward: CompiledReward, new_state: dict[str, any]
+    ) -> float:
+        # Per-term values are kept for logging/inspection alongside the total.
+        # The new state's features become the next step's prior, so each step only
+        # reads one stats dict into one of two preallocated rows
+        cached = self._reward_features.get(reward)
+        if cached is None:
+            rows = np.empty((2, 1, len(reward.fields)))
+            cached = self._reward_features[reward] = [None, rows[0], rows[1]]
+
+        stats, prior, current = cached
+        if stats is not self.prior_game_stats:
+            reward.stats_features(self.prior_game_stats, out=prior)
+        reward.stats_features(new_state, out=current)
+
+        breakdown = reward.evaluate_features(prior, current)
+        self._reward_features[reward] = [new_state, current, prior]
+
+        self.reward_breakdown = breakdown[0]
+        return float(breakdown.sum())
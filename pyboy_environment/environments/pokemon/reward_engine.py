@@ -0,0 +1,151 @@
+"""
+Declarative reward terms compiled into vectorised numpy operations.
+
+A term is (field, transform, weight) over the STATS_DTYPE fields - party array
+fields are summed across the party first. Terms sharing a transform are evaluated
+together on the (steps, fields) delta matrix, so the same compiled reward scores a
+single environment step, a batch of environments or a whole recorded trajectory.
+Live environments score game stats dicts with stats_features() and
+evaluate_features(), which skip building STATS_DTYPE records.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from pyboy_environment.environments.pokemon.stats_log import STATS_DTYPE
+
+# transform(delta, current) -> per-step term value before weighting
+TRANSFORMS = {
+    "delta": lambda delta, current: delta,
+    "increase": lambda delta, current: np.maximum(delta, 0),
+    "decrease": lambda delta, current: np.minimum(delta, 0),
+    "gained": lambda delta, current: (delta > 0).astype(np.float32),
+    "lost": lambda delta, current: (delta < 0).astype(np.float32),
+    "changed": lambda delta, current: (delta != 0).astype(np.float32),
+    "value": lambda delta, current: current,
+}
+
+
+# Game stats dict lookup for each STATS_DTYPE field - party lists are summed
+STATS_READERS = {
+    "map_id": lambda stats: stats["location"]["map_id"],
+    "x": lambda stats: stats["location"]["x"],
+    "y": lambda stats: stats["location"]["y"],
+    "party_size": lambda stats: stats["party_size"],
+    "levels": lambda stats: sum(stats["levels"]),
+    "hp": lambda stats: sum(stats["hp"]["current"]),
+    "max_hp": lambda stats: sum(stats["hp"]["max"]),
+    "xp": lambda stats: stats["xp_total"],
+    "badges": lambda stats: stats["badges"],
+    "seen_pokemon": lambda stats: stats["seen_pokemon"],
+    "caught_pokemon": lambda stats: stats["caught_pokemon"],
+    "money": lambda stats: stats["money"],
+    "event_count": lambda stats: stats["event_count"],
+}
+
+
+class RewardTerm(NamedTuple):
+    field: str
+    transform: str = "delta"
+    weight: float = 1.0
+
+
+# Mirrors the example _*_reward helpers on PokemonEnvironment
+DEFAULT_REWARD_TERMS = [
+    RewardTerm("caught_pokemon"),
+    RewardTerm("seen_pokemon"),
+    RewardTerm("hp"),
+    RewardTerm("xp"),
+    RewardTerm("levels"),
+    RewardTerm("badges"),
+    RewardTerm("money"),
+    RewardTerm("event_count"),
+]
+
+
+class CompiledReward:
+    def __init__(self, terms: list) -> None:
+        self.terms = [RewardTerm(*term) for term in terms]
+
+        for term in self.terms:
+            if term.field not in STATS_DTYPE.names:
+                raise ValueError(f"Unknown stats field: {term.field}")
+            if term.transform not in TRANSFORMS:
+                raise ValueError(f"Unknown reward transform: {term.transform}")
+
+        self.names = [f"{term.field}:{term.transform}" for term in self.terms]
+        self.fields = sorted({term.field for term in self.terms})
+        column = {field: i for i, field in enumerate(self.fields)}
+        self._readers = [STATS_READERS.get(field) for field in self.fields]
+        # Record only fields (step, reward, ...) are not in a game stats dict
+        self._record_only = [
+            field for field in self.fields if field not in STATS_READERS
+        ]
+
+        # One vectorised op per transform over all the terms that use it
+        self._groups = []
+        for transform in sorted({term.transform for term in self.terms}):
+            indices = [
+                i for i, term in enumerate(self.terms) if term.transform == transform
+            ]
+            self._groups.append(
+                (
+                    TRANSFORMS[transform],
+                    np.array(indices),
+                    np.array([column[self.terms[i].field] for i in indices]),
+                    np.array(
+                        [self.terms[i].weight for i in indices], dtype=np.float32
+                    ),
+                )
+            )
+
+    def features(self, records: np.ndarray) -> np.ndarray:
+        records = np.atleast_1d(records)
+        features = np.empty((len(records), len(self.fields)), dtype=np.float64)
+        for i, field in enumerate(self.fields):
+            values = records[field]
+            if values.ndim > 1:
+                values = values.sum(axis=1)
+            features[:, i] = values
+        return features
+
+    def stats_features(self, game_stats: dict, out: np.ndarray = None) -> np.ndarray:
+        # The (1, fields) features row of one game stats dict
+        if self._record_only:
+            raise ValueError(
+                f"Fields {self._record_only} can only be scored on recorded trajectories"
+            )
+        features = np.empty((1, len(self.fields))) if out is None else out
+        for i, read in enumerate(self._readers):
+            features[0, i] = read(game_stats)
+        return features
+
+    def evaluate_features(
+        self, prior_features: np.ndarray, current_features: np.ndarray
+    ) -> np.ndarray:
+        deltas = current_features - prior_features
+
+        breakdown = np.empty((len(deltas), len(self.terms)), dtype=np.float32)
+        for transform, term_indices, columns, weights in self._groups:
+            breakdown[:, term_indices] = (
+                transform(deltas[:, columns], current_features[:, columns]) * weights
+            )
+        return breakdown
+
+    def breakdown(self, prior: np.ndarray, current: np.ndarray) -> np.ndarray:
+        return self.evaluate_features(self.features(prior), self.features(current))
+
+    def __call__(self, prior: np.ndarray, current: np.ndarray) -> tuple:
+        breakdown = self.breakdown(prior, current)
+        return breakdown.sum(axis=1), breakdown
+
+    def evaluate_trajectory(self, records: np.ndarray) -> tuple:
+        # Reward for step t is scored from record t-1 to record t
+        return self(records[:-1], records[1:])
+
+    def evaluate_stats(self, prior_stats: dict, new_stats: dict) -> tuple:
+        breakdown = self.evaluate_features(
+            self.stats_features(prior_stats), self.stats_features(new_stats)
+        )
+        return float(breakdown.sum()), breakdown[0]
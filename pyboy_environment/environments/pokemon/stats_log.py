@@ -0,0 +1,138 @@
+"""
+Fixed-width per-step game stats log backed by a memory-mapped file.
+
+Each step is stored as one STATS_DTYPE record so a finished log can be opened
+with load_stats() as a zero-parse np.memmap. step is the step within the episode
+and episode counts resets, so episode boundaries can be recovered offline.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+PARTY_SIZE = 6
+
+STATS_DTYPE = np.dtype(
+    [
+        ("episode", np.uint32),
+        ("step", np.uint32),
+        ("map_id", np.uint8),
+        ("x", np.uint8),
+        ("y", np.uint8),
+        ("party_size", np.uint8),
+        ("levels", np.uint8, (PARTY_SIZE,)),
+        ("hp", np.uint16, (PARTY_SIZE,)),
+        ("max_hp", np.uint16, (PARTY_SIZE,)),
+        ("xp", np.uint32, (PARTY_SIZE,)),
+        ("badges", np.uint8),
+        ("seen_pokemon", np.uint16),
+        ("caught_pokemon", np.uint16),
+        ("money", np.uint32),
+        ("event_count", np.uint16),
+        ("reward", np.float32),
+        ("action", np.float32),
+    ]
+)
+
+
+def stats_to_record(
+    game_stats: dict[str, any],
+    reward: float = 0.0,
+    action: float = 0.0,
+    step: int = 0,
+    out: np.ndarray = None,
+    episode: int = 0,
+) -> np.ndarray:
+    record = np.zeros((), dtype=STATS_DTYPE) if out is None else out
+
+    record["episode"] = episode
+    record["step"] = step
+    record["map_id"] = game_stats["location"]["map_id"]
+    record["x"] = game_stats["location"]["x"]
+    record["y"] = game_stats["location"]["y"]
+    record["party_size"] = game_stats["party_size"]
+    record["levels"] = game_stats["levels"]
+    record["hp"] = game_stats["hp"]["current"]
+    record["max_hp"] = game_stats["hp"]["max"]
+    record["xp"] = game_stats["xp"]
+    record["badges"] = game_stats["badges"]
+    record["seen_pokemon"] = game_stats["seen_pokemon"]
+    record["caught_pokemon"] = game_stats["caught_pokemon"]
+    record["money"] = game_stats["money"]
+    record["event_count"] = game_stats["event_count"]
+    record["reward"] = reward
+    # Continuous actions arrive as single element arrays
+    record["action"] = np.asarray(action, dtype=np.float32).reshape(-1)[0]
+    return record
+
+
+class StatsRecorder:
+    def __init__(self, path: str, chunk_size: int = 65536) -> None:
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+
+        self.count = 0
+        self._capacity = 0
+        self._records = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        open(self.path, "wb").close()
+        self._grow()
+
+    def _grow(self) -> None:
+        if self._records is not None:
+            self._records.flush()
+            self._records = None
+
+        self._capacity += self.chunk_size
+        os.truncate(self.path, self._capacity * STATS_DTYPE.itemsize)
+        self._records = np.memmap(
+            self.path, dtype=STATS_DTYPE, mode="r+", shape=(self._capacity,)
+        )
+
+    def append(
+        self,
+        game_stats: dict[str, any],
+        reward: float,
+        action: float,
+        step: int = None,
+        episode: int = 0,
+    ) -> None:
+        if self.count == self._capacity:
+            self._grow()
+
+        step = self.count if step is None else step
+        stats_to_record(
+            game_stats,
+            reward,
+            action,
+            step,
+            out=self._records[self.count : self.count + 1],
+            episode=episode,
+        )
+        self.count += 1
+
+    def flush(self) -> None:
+        self._records.flush()
+
+    def close(self) -> None:
+        if self._records is None:
+            return
+
+        self._records.flush()
+        self._records = None
+        # Drop the unused tail of the last chunk
+        os.truncate(self.path, self.count * STATS_DTYPE.itemsize)
+
+    def __enter__(self) -> "StatsRecorder":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def load_stats(path: str) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=STATS_DTYPE)
+    return np.memmap(path, dtype=STATS_DTYPE, mode="r")
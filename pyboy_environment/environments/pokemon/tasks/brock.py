@@ -1,14 +1,48 @@
 from functools import cached_property
 
-import cv2
 import numpy as np
 from pyboy.utils import WindowEvent
 
+from pyboy_environment.environments.action_macros import ActionTable
+from pyboy_environment.environments.event_log import EventLog
 from pyboy_environment.environments.pokemon.pokemon_environment import (
+    WATCH_RANGES,
     PokemonEnvironment,
 )
 from pyboy_environment.environments.pokemon import pokemon_constants as pkc
-import torch
+from pyboy_environment.environments.pokemon.reward_engine import (
+    CompiledReward,
+    RewardTerm,
+)
+
+OBSERVATION_MODES = ("float", "uint8", "tilemap", "metatile")
+
+# Flat bonus whenever the party's total XP goes up
+GAIN_XP_REWARD = CompiledReward([RewardTerm("xp", "gained", 20)])
+
+# cv2 and torch are loaded on first use by the observation modes that need them, so
+# importing the task (and tilemap/metatile workers) stays cheap
+_cv2 = None
+_torch = None
+
+
+def _import_cv2():
+    global _cv2
+    if _cv2 is None:
+        import cv2
+
+        _cv2 = cv2
+    return _cv2
+
+
+def _import_torch():
+    global _torch
+    if _torch is None:
+        import torch
+
+        _torch = torch
+    return _torch
+
 
 class PokemonBrock(PokemonEnvironment):
     def __init__(
@@ -16,7 +50,20 @@ class PokemonBrock(PokemonEnvironment):
         act_freq: int,
         emulation_speed: int = 0,
         headless: bool = False,
+        profile: str = None,
+        fast_forward_dialog: bool = False,
+        observation_mode: str = "float",
+        action_table: ActionTable = None,
+        game_events: bool = False,
     ) -> None:
+        # "float" - flat float32 tensor, "uint8" - {"frame": uint8, "stats": float32}
+        # "tilemap"/"metatile" - 18x20/9x10 tile class and sprite grids plus stats
+        if observation_mode not in OBSERVATION_MODES:
+            raise ValueError(f"Unknown observation mode: {observation_mode}")
+        self.observation_mode = observation_mode
+        # The float and uint8 observations are built from the rendered screen
+        self.observes_screen = observation_mode in ("float", "uint8")
+
         self.visited_coord = set()
         self.visited_map = set()
         self.is_touching_grass = False
@@ -24,6 +71,9 @@ class PokemonBrock(PokemonEnvironment):
         # enemy stats
         self.enemy_hp = -1
 
+        # Reward events go to a ring buffer instead of stdout - see event_log.summary()
+        self.event_log = EventLog()
+
         valid_actions: list[WindowEvent] = [
             WindowEvent.PRESS_ARROW_DOWN,
             WindowEvent.PRESS_ARROW_LEFT,
@@ -50,8 +100,17 @@ class PokemonBrock(PokemonEnvironment):
             valid_actions=valid_actions,
             release_button=release_button,
             headless=headless,
+            profile=profile,
+            fast_forward_dialog=fast_forward_dialog,
+            action_table=action_table,
+            game_events=game_events,
         )
 
+    def _configure_emulator(self) -> None:
+        super()._configure_emulator()
+        # The attack reward is only re-scored on steps where the enemy's HP bytes change
+        self.watch_ram("enemy_hp", *WATCH_RANGES["enemy_hp"])
+
     def _get_state(self) -> np.ndarray:
         # Implement your state retrieval logic here
         game_stats = self._generate_game_stats()
@@ -70,18 +129,39 @@ class PokemonBrock(PokemonEnvironment):
             # game_stats["caught_pokemon"],   # Number of Pokemon seen
         ])
         
+        if self.observation_mode in ("tilemap", "metatile"):
+            observation = self.tile_classifier.observation(
+                metatile=self.observation_mode == "metatile"
+            )
+            observation["stats"] = stats.astype(np.float32)
+            return observation
+
+        cv2 = _import_cv2()
+
         # Grab the RGB frame using the existing grab_frame function
         frame = self.grab_frame(height=240, width=300)
         frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self.observation_mode == "uint8":
+            # Kept as uint8 - observations.dequantise converts at batch-sample time
+            frame_resized = cv2.resize(
+                frame_gray, (75, 60), interpolation=cv2.INTER_AREA
+            )
+            return {"frame": frame_resized, "stats": stats.astype(np.float32)}
+
         frame_normalized = frame_gray  # Normalize pixel values to [0, 1]
         frame_normalized = frame_gray / 255.0
         frame_resized = cv2.resize(frame_normalized, (75, 60), interpolation=cv2.INTER_AREA).flatten()
+        torch = _import_torch()
         frame_tensor = torch.tensor(frame_resized, dtype=torch.float32)
         stats_tensor = torch.tensor(stats, dtype=torch.float32)
         combined_tensor = torch.cat((stats_tensor, frame_tensor))
         return combined_tensor  
 
     def _calculate_reward(self, new_state: dict) -> float:
+        for name, frame in self.step_events:
+            self.event_log.emit(f"game:{name}", frame, step=self.steps)
+
         # REWARD
         new_coord_reward = self.reward_new_coord(new_state)
         touch_grass_reward = self.reward_touch_grass(new_state)
@@ -90,9 +170,9 @@ class PokemonBrock(PokemonEnvironment):
     
         attack_reward = 0
         if self.in_dialog:
-            if self.enemy_hp != self.get_enemy_hp():
+            if "enemy_hp" in self.ram_watcher.changes:
                 attack_reward = self.reward_attack_pokemon(new_state)
-                print(f"---FIGHTING REWARD: {attack_reward}---")
+                self.event_log.emit("fighting_reward", attack_reward, step=self.steps)
         
         reward = new_coord_reward + touch_grass_reward + new_map_reward + gain_xp_reward + attack_reward
         # + new_map_reward + gain_xp_reward + see_pokemon_reward + attack_reward
@@ -145,8 +225,7 @@ class PokemonBrock(PokemonEnvironment):
         old_map = self.prior_game_stats["location"]["map_id"]
 
         if map not in self.visited_map: #visit new map
-            map_name = new_state["location"]["map"]
-            print(f"---NEW MAP: {map_name}---")
+            self.event_log.emit("new_map", map, step=self.steps)
             self.visited_map.add(map)
             return 3
         return 0
@@ -168,10 +247,10 @@ class PokemonBrock(PokemonEnvironment):
         return 0
     
     def reward_gain_xp(self, new_state: dict[str, any]) -> float:
-        if sum(new_state["xp"]) > sum(self.prior_game_stats["xp"]):
-            print("---GAIN XP---")
-            return 20 #10
-        return 0
+        reward = self._compiled_reward(GAIN_XP_REWARD, new_state)
+        if reward:
+            self.event_log.emit("gain_xp", new_state["xp_total"], step=self.steps)
+        return reward
 
     def reward_attack_pokemon(self, new_state: dict[str, any]) -> float:
         new_enemy_hp = self.get_enemy_hp()
@@ -179,7 +258,9 @@ class PokemonBrock(PokemonEnvironment):
         self_hp = sum(hp["current"]) / sum(hp["max"])
 
         if new_enemy_hp < self.enemy_hp:
-            print(f"--ATTACK: self: {self_hp} enemy: new {new_enemy_hp}, old {self.enemy_hp}--")
+            self.event_log.emit(
+                "attack", self_hp, new_enemy_hp, self.enemy_hp, step=self.steps
+            )
             self.attack_count += 1
             self.enemy_hp = new_enemy_hp
             return 5 * (self.attack_count ** 2)
@@ -198,13 +279,17 @@ class PokemonBrock(PokemonEnvironment):
     
     def reward_catch_new_pokemon(self, new_state: dict[str, any]) -> float:
         if new_state["caught_pokemon"] > self.prior_game_stats["caught_pokemon"]:
-            print("CATCH NEW POKEMON")
+            self.event_log.emit(
+                "catch_pokemon", new_state["caught_pokemon"], step=self.steps
+            )
             return 1 #0.8
         return 0
 
     def reward_see_new_pokemon(self, new_state: dict[str, any]) -> float:
         if new_state["seen_pokemon"] > self.prior_game_stats["seen_pokemon"]:
-            print("SEE NEW POKEMON")
+            self.event_log.emit(
+                "see_pokemon", new_state["seen_pokemon"], step=self.steps
+            )
             return 0.7 #0.5
         return 0
     
@@ -224,21 +309,17 @@ class PokemonBrock(PokemonEnvironment):
         )
 
     def _xp_reward(self, new_state: dict[str, any]) -> int:
-        return sum(new_state["xp"]) - sum(self.prior_game_stats["xp"])
+        return new_state["xp_total"] - self.prior_game_stats["xp_total"]
 
     ######################
     ## HELPER FUNCTIONS ##
     ######################
-    def get_enemy_hp(self) -> None:
-        enemy_current_hp = self._read_m(0xCFE7) 
-        enemy_max_hp = self._read_m(0xCFF5)
+    def get_enemy_hp(self) -> float:
+        # Fraction of the enemy's 16-bit max HP remaining
+        return self.battle_state.enemy.hp_fraction
 
-        if enemy_current_hp == 0:
-            return 0
-        return enemy_current_hp/enemy_max_hp
-        
     def in_battle(self) -> bool:
-        return self._read_m(0xD057) != 0x00
+        return self.battle_state.in_battle
     
     def in_dialog(self) -> bool:
         screen: np.ndarray = self.pyboy.game_area()  # 383
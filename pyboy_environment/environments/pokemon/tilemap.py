@@ -0,0 +1,120 @@
+"""
+Semantic tile-class observations built straight from the pokered screen tile buffer.
+
+wTileMap holds the 18x20 background tiles currently on screen. Each tile id is
+mapped to a small integer class through a 256 entry lookup table that is cached per
+(tileset, collision list, grass tile) - the table is only rebuilt when the map's
+tileset changes. Sprites from wSpriteStateData1 are rasterised into a separate
+overlay grid of the same shape.
+
+https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/data/tilesets/door_tile_ids.asm
+"""
+
+import numpy as np
+
+WALL, WALKABLE, GRASS, WATER, NPC, PLAYER, DOOR, TEXT = range(8)
+
+# Shared with PokemonEnvironment's dialog detection
+SCREEN_HEIGHT, SCREEN_WIDTH = 18, 20
+TILEMAP_START = 0xC3A0
+TILEMAP_END = TILEMAP_START + SCREEN_HEIGHT * SCREEN_WIDTH
+TEXT_BOX_ROW = 12
+TEXT_BOX_CORNER = TEXT_BOX_ROW * SCREEN_WIDTH  # top-left tile of the bottom text box
+TEXT_BOX_CORNER_TILE = 0x79
+
+SPRITE_DATA_START = 0xC100  # wSpriteStateData1, 16 sprites of 16 bytes
+NUM_SPRITES = 16
+
+CUR_MAP_TILESET = 0xD367
+COLLISION_POINTER = 0xD530
+GRASS_TILE = 0xD535
+
+# tileset id -> door tile ids
+DOOR_TILES = {
+    0: (0x1B, 0x58),  # OVERWORLD
+    2: (0x5E,),  # MART
+    3: (0x3A,),  # FOREST
+    8: (0x54,),  # HOUSE
+    9: (0x3B,),  # FOREST_GATE
+    10: (0x3B,),  # MUSEUM
+    12: (0x3B,),  # GATE
+    13: (0x1E,),  # SHIP
+    18: (0x1C, 0x38, 0x1A),  # LOBBY
+    19: (0x1A, 0x1C, 0x53),  # MANSION
+    20: (0x34,),  # LAB
+    22: (0x43, 0x58, 0x1B),  # FACILITY
+    23: (0x3B, 0x1B),  # PLATEAU
+}
+
+# Water tile of the outdoor style tilesets
+WATER_TILES = {0: (0x14,), 3: (0x14,), 13: (0x14,), 14: (0x14,), 17: (0x14,)}
+
+
+class TileClassifier:
+    def __init__(self, pyboy) -> None:
+        self.pyboy = pyboy
+        self._tables: dict[tuple, np.ndarray] = {}
+
+    def _class_table(self) -> np.ndarray:
+        memory = self.pyboy.memory
+        tileset = memory[CUR_MAP_TILESET]
+        collision_pointer = memory[COLLISION_POINTER] + (
+            memory[COLLISION_POINTER + 1] << 8
+        )
+        grass_tile = memory[GRASS_TILE]
+
+        key = (tileset, collision_pointer, grass_tile)
+        if key in self._tables:
+            return self._tables[key]
+
+        table = np.full(256, WALL, dtype=np.uint8)
+        for i in range(0x180):
+            tile = memory[collision_pointer + i]
+            if tile == 0xFF:
+                break
+            table[tile] = WALKABLE
+        table[list(WATER_TILES.get(tileset, ()))] = WATER
+        table[list(DOOR_TILES.get(tileset, ()))] = DOOR
+        if grass_tile != 0xFF:
+            table[grass_tile] = GRASS
+
+        self._tables[key] = table
+        return table
+
+    def tile_classes(self) -> np.ndarray:
+        tiles = np.array(
+            self.pyboy.memory[TILEMAP_START:TILEMAP_END], dtype=np.uint8
+        ).reshape(SCREEN_HEIGHT, SCREEN_WIDTH)
+
+        classes = self._class_table()[tiles]
+        if tiles[TEXT_BOX_ROW, 0] == TEXT_BOX_CORNER_TILE:
+            classes[TEXT_BOX_ROW:] = TEXT
+        return classes
+
+    def sprite_overlay(self) -> np.ndarray:
+        overlay = np.zeros((SCREEN_HEIGHT, SCREEN_WIDTH), dtype=np.uint8)
+        sprite_data_end = SPRITE_DATA_START + NUM_SPRITES * 16
+        sprites = np.array(
+            self.pyboy.memory[SPRITE_DATA_START:sprite_data_end], dtype=np.uint8
+        ).reshape(NUM_SPRITES, 16)
+
+        # Byte 0 is the picture id (0 = unused), byte 2 is 0xFF when off screen
+        for i in np.flatnonzero((sprites[:, 0] != 0) & (sprites[:, 2] != 0xFF)):
+            row = (int(sprites[i, 4]) + 4) // 8
+            col = int(sprites[i, 6]) // 8
+            if row < SCREEN_HEIGHT - 1 and col < SCREEN_WIDTH - 1:
+                overlay[row : row + 2, col : col + 2] = PLAYER if i == 0 else NPC
+        return overlay
+
+    def observation(self, metatile: bool = False) -> dict[str, np.ndarray]:
+        tiles = self.tile_classes()
+        sprites = self.sprite_overlay()
+
+        if metatile:
+            # Collision is decided by the bottom-left tile of each 16x16 block
+            tiles = tiles[1::2, ::2]
+            sprites = sprites.reshape(
+                SCREEN_HEIGHT // 2, 2, SCREEN_WIDTH // 2, 2
+            ).max(axis=(1, 3))
+
+        return {"tiles": tiles, "sprites": sprites}
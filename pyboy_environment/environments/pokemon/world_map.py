@@ -0,0 +1,209 @@
+"""
+Global world coordinates for pokered maps and a visit-count coverage heatmap.
+
+Map origins are derived once per ROM from the map headers: starting at Pallet Town
+the north/south/west/east connections are walked breadth-first and every connected
+map is placed relative to its neighbour using the connection alignment bytes.
+Maps without outdoor connections (buildings, caves, gyms) are packed row by row
+into an annex below the overworld. Converting (map_id, x, y) into global (x, y)
+is then a single lookup into the origin table.
+
+https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/macros/scripts/maps.asm
+"""
+
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+NUM_MAPS = 248
+
+# Bank 0 pointer table and bank 3 bank table, both indexed by map id
+MAP_HEADER_POINTERS = 0x01AE
+MAP_HEADER_BANKS = 0xC23D
+
+# Connection flag bits and the order the connection entries follow the header
+CONNECTIONS = (("north", 3), ("south", 2), ("west", 1), ("east", 0))
+HEADER_SIZE = 10
+CONNECTION_SIZE = 11
+
+# Tiles left free around every map in the annex
+ANNEX_PADDING = 2
+
+
+def _rom_offset(bank: int, pointer: int) -> int:
+    if pointer < 0x4000:
+        return pointer
+    return bank * 0x4000 + pointer - 0x4000
+
+
+def _signed(byte: int) -> int:
+    return byte - 256 if byte > 127 else byte
+
+
+def read_map_headers(rom: np.ndarray) -> list[dict]:
+    headers = []
+    for map_id in range(NUM_MAPS):
+        pointer = int(rom[MAP_HEADER_POINTERS + 2 * map_id]) | (
+            int(rom[MAP_HEADER_POINTERS + 2 * map_id + 1]) << 8
+        )
+        bank = int(rom[MAP_HEADER_BANKS + map_id])
+        offset = _rom_offset(bank, pointer)
+
+        # Heights and widths are in 2x2 tile blocks, player coordinates in tiles
+        height, width, flags = rom[offset + 1], rom[offset + 2], rom[offset + 9]
+        header = {"height": 2 * int(height), "width": 2 * int(width)}
+
+        connection = offset + HEADER_SIZE
+        for direction, bit in CONNECTIONS:
+            if not flags >> bit & 1:
+                continue
+            header[direction] = (
+                int(rom[connection]),
+                _signed(int(rom[connection + 7])),
+                _signed(int(rom[connection + 8])),
+            )
+            connection += CONNECTION_SIZE
+        headers.append(header)
+    return headers
+
+
+def _neighbour_origin(
+    header: dict, direction: str, y_align: int, x_align: int
+) -> tuple[int, int]:
+    # Alignment is the player's position in the target map right after crossing
+    if direction == "north":
+        return -x_align, -1 - y_align
+    if direction == "south":
+        return -x_align, header["height"] - y_align
+    if direction == "west":
+        return -1 - x_align, -y_align
+    return header["width"] - x_align, -y_align
+
+
+class WorldMap:
+    def __init__(self, headers: list[dict]) -> None:
+        self.sizes = np.array(
+            [(header["width"], header["height"]) for header in headers], dtype=np.int32
+        )
+
+        # Maps reachable from Pallet Town through outdoor connections
+        placed = {0: (0, 0)}
+        queue = deque([0])
+        while queue:
+            map_id = queue.popleft()
+            origin_x, origin_y = placed[map_id]
+            for direction, _ in CONNECTIONS:
+                if direction not in headers[map_id]:
+                    continue
+                target, y_align, x_align = headers[map_id][direction]
+                if target >= NUM_MAPS or target in placed:
+                    continue
+                dx, dy = _neighbour_origin(headers[map_id], direction, y_align, x_align)
+                placed[target] = (origin_x + dx, origin_y + dy)
+                queue.append(target)
+
+        ids = np.array(sorted(placed))
+        origins = np.array([placed[map_id] for map_id in ids], dtype=np.int32)
+        top_left = origins.min(axis=0)
+        bottom_right = (origins + self.sizes[ids]).max(axis=0)
+        overworld_width = int(bottom_right[0] - top_left[0])
+
+        # 256 rows so any byte read from wCurMap indexes safely
+        self.origins = np.zeros((256, 2), dtype=np.int32)
+        self.origins[ids] = origins - top_left
+        self.overworld = np.zeros(256, dtype=bool)
+        self.overworld[ids] = True
+
+        # Shelf pack the remaining maps below the overworld
+        cursor_x, cursor_y = 0, int(bottom_right[1] - top_left[1]) + ANNEX_PADDING
+        shelf_height = 0
+        for map_id in range(NUM_MAPS):
+            if map_id in placed:
+                continue
+            width, height = self.sizes[map_id] + ANNEX_PADDING
+            if cursor_x > 0 and cursor_x + width > overworld_width:
+                cursor_x, cursor_y = 0, cursor_y + shelf_height
+                shelf_height = 0
+            self.origins[map_id] = (cursor_x, cursor_y)
+            cursor_x += width
+            shelf_height = max(shelf_height, height)
+
+        extent = self.origins[:NUM_MAPS] + self.sizes
+        self.shape = (int(extent[:, 1].max()), int(extent[:, 0].max()))
+
+    def to_global(self, map_id, x, y) -> tuple:
+        # Scalars or equally shaped arrays of map ids and local coordinates
+        origin = self.origins[map_id]
+        return origin[..., 0] + x, origin[..., 1] + y
+
+
+@lru_cache(maxsize=None)
+def load_world_map(rom_path: str) -> WorldMap:
+    rom = np.fromfile(rom_path, dtype=np.uint8)
+    return WorldMap(read_map_headers(rom))
+
+
+class CoverageMap:
+    def __init__(self, shape: tuple[int, int]) -> None:
+        self.counts = np.zeros(shape, dtype=np.uint32)
+
+    @classmethod
+    def for_world(cls, world_map: WorldMap) -> "CoverageMap":
+        return cls(world_map.shape)
+
+    def update(self, x: int, y: int) -> None:
+        if 0 <= y < self.counts.shape[0] and 0 <= x < self.counts.shape[1]:
+            self.counts[y, x] += 1
+
+    def update_batch(self, xs: np.ndarray, ys: np.ndarray) -> None:
+        # Out of range coordinates are dropped, as in update()
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        height, width = self.counts.shape
+        inside = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+        xs, ys = xs[inside], ys[inside]
+        # add.at accumulates repeated coordinates, unlike fancy index assignment
+        np.add.at(self.counts, (ys, xs), 1)
+
+    def merge(self, *others) -> "CoverageMap":
+        # Accepts other CoverageMaps or raw count arrays, e.g. from worker processes
+        for other in others:
+            counts = other.counts if isinstance(other, CoverageMap) else other
+            self.counts += counts.astype(np.uint32, copy=False)
+        return self
+
+    def clear(self) -> None:
+        self.counts[:] = 0
+
+    @property
+    def visited(self) -> int:
+        return int(np.count_nonzero(self.counts))
+
+    def save(self, path: str) -> None:
+        np.save(path, self.counts)
+
+    @classmethod
+    def load(cls, path: str) -> "CoverageMap":
+        coverage = cls((0, 0))
+        coverage.counts = np.load(path).astype(np.uint32, copy=False)
+        return coverage
+
+    def to_image(self, scale: int = 4) -> np.ndarray:
+        import cv2
+
+        # Log scaled so a few heavily visited tiles do not wash out the rest
+        heat = np.log1p(self.counts.astype(np.float32))
+        if heat.max() > 0:
+            heat /= heat.max()
+        image = cv2.applyColorMap((heat * 255).astype(np.uint8), cv2.COLORMAP_INFERNO)
+        image[self.counts == 0] = 0
+        return cv2.resize(
+            image,
+            (image.shape[1] * scale, image.shape[0] * scale),
+            interpolation=cv2.INTER_NEAREST,
+        )
+
+    def save_image(self, path: str, scale: int = 4) -> None:
+        import cv2
+
+        cv2.imwrite(path, self.to_image(scale))
@@ -0,0 +1,139 @@
+"""
+Raw per-step WRAM traces and their vectorised decoding into stats records.
+
+A trace file is the 8 KiB work RAM (0xC000-0xDFFF) appended once per step, so it
+can be opened as a (steps, 0x2000) uint8 memmap. decode_wram_trace turns a whole
+trace into STATS_DTYPE records with column-wise numpy operations - the same values
+PokemonEnvironment._generate_game_stats reads one step at a time. The episode and
+episode step of every row are kept in a <trace>.steps sidecar (TRACE_STEPS_DTYPE).
+
+https://github.com/pret/pokered/blob/91dc3c9f9c8fd529bb6e8307b58b96efa0bec67e/ram/wram.asm
+"""
+
+import os
+
+import numpy as np
+
+from pyboy_environment.environments.pokemon.stats_log import PARTY_SIZE, STATS_DTYPE
+from pyboy_environment.environments.ram_watch import POPCOUNT, WRAM_END, WRAM_START
+
+WRAM_SIZE = WRAM_END - WRAM_START
+
+# Party mon structs are 0x2C bytes apart starting at wPartyMon1
+PARTY_STRIDE = 0x2C
+PARTY_HP = 0xD16C
+PARTY_XP = 0xD179
+PARTY_LEVEL = 0xD18C
+PARTY_MAX_HP = 0xD18D
+
+TRACE_STEPS_DTYPE = np.dtype([("episode", np.uint32), ("step", np.uint32)])
+
+
+def _column(wram: np.ndarray, address: int) -> np.ndarray:
+    return wram[:, address - WRAM_START].astype(np.uint32)
+
+
+def _party_columns(wram: np.ndarray, address: int, width: int) -> np.ndarray:
+    # (steps, party, width) bytes of one field across the six party slots
+    offsets = (
+        address
+        - WRAM_START
+        + PARTY_STRIDE * np.arange(PARTY_SIZE)[:, None]
+        + np.arange(width)[None, :]
+    )
+    return wram[:, offsets].astype(np.uint32)
+
+
+def _big_endian(values: np.ndarray) -> np.ndarray:
+    result = np.zeros(values.shape[:-1], dtype=np.uint32)
+    for i in range(values.shape[-1]):
+        result = result << 8 | values[..., i]
+    return result
+
+
+def _popcount(wram: np.ndarray, start: int, end: int) -> np.ndarray:
+    return POPCOUNT[wram[:, start - WRAM_START : end - WRAM_START]].sum(
+        axis=1, dtype=np.uint32
+    )
+
+
+def _bcd(values: np.ndarray) -> np.ndarray:
+    return 10 * (values >> 4) + (values & 0x0F)
+
+
+def decode_wram_trace(
+    wram: np.ndarray,
+    rewards: np.ndarray = None,
+    actions: np.ndarray = None,
+    steps: np.ndarray = None,
+) -> np.ndarray:
+    wram = np.asarray(wram, dtype=np.uint8).reshape(-1, WRAM_SIZE)
+    records = np.zeros(len(wram), dtype=STATS_DTYPE)
+
+    # Without TRACE_STEPS_DTYPE rows the trace is treated as a single episode
+    if steps is None:
+        records["step"] = np.arange(len(wram))
+    else:
+        records["episode"] = steps["episode"]
+        records["step"] = steps["step"]
+    records["map_id"] = _column(wram, 0xD35E)
+    records["x"] = _column(wram, 0xD362)
+    records["y"] = _column(wram, 0xD361)
+    records["party_size"] = _column(wram, 0xD163)
+    records["levels"] = _party_columns(wram, PARTY_LEVEL, 1)[..., 0]
+    records["hp"] = _big_endian(_party_columns(wram, PARTY_HP, 2))
+    records["max_hp"] = _big_endian(_party_columns(wram, PARTY_MAX_HP, 2))
+    records["xp"] = _big_endian(_party_columns(wram, PARTY_XP, 3))
+    records["badges"] = POPCOUNT[wram[:, 0xD356 - WRAM_START]]
+    records["caught_pokemon"] = _popcount(wram, 0xD2F7, 0xD30A)
+    records["seen_pokemon"] = _popcount(wram, 0xD30A, 0xD31D)
+
+    money = _bcd(wram[:, 0xD347 - WRAM_START : 0xD34A - WRAM_START].astype(np.uint32))
+    records["money"] = 10000 * money[:, 0] + 100 * money[:, 1] + money[:, 2]
+    records["event_count"] = _popcount(wram, 0xD747, 0xD886)
+
+    if rewards is not None:
+        records["reward"] = rewards
+    if actions is not None:
+        records["action"] = np.asarray(actions, dtype=np.float32).reshape(len(wram))
+    return records
+
+
+class WramTraceRecorder:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.count = 0
+        self._file = open(path, "wb")
+        self._steps_file = open(f"{path}.steps", "wb")
+
+    def append(self, pyboy, step: int = None, episode: int = 0) -> None:
+        step = self.count if step is None else step
+        self._file.write(bytes(pyboy.memory[WRAM_START:WRAM_END]))
+        self._steps_file.write(np.array((episode, step), TRACE_STEPS_DTYPE).tobytes())
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._steps_file.close()
+            self._file = None
+            self._steps_file = None
+
+    def __enter__(self) -> "WramTraceRecorder":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def load_wram_trace(path: str) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.empty((0, WRAM_SIZE), dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r").reshape(-1, WRAM_SIZE)
+
+
+def load_trace_steps(path: str) -> np.ndarray:
+    steps_path = f"{path}.steps"
+    if not os.path.exists(steps_path):
+        return None
+    return np.fromfile(steps_path, dtype=TRACE_STEPS_DTYPE)
@@ -1,13 +1,20 @@
 from abc import ABCMeta, abstractmethod
+import time
 from functools import cached_property
 from pathlib import Path
+from typing import Callable
 
-import cv2
 import numpy as np
-from pyboy import PyBoy
+
+from pyboy_environment.environments.emulator_pool import get_pool
+from pyboy_environment.environments.emulator_profiles import get_profile, profile_for
+from pyboy_environment.environments.ram_watch import RamChange, RamWatcher
+from pyboy_environment.environments.video_recorder import VideoRecorder
 
 
 class PyboyEnvironment(metaclass=ABCMeta):
+    # Set by tasks whose observations are built from screen pixels
+    observes_screen = False
 
     def __init__(
         self,
@@ -20,6 +27,7 @@ class PyboyEnvironment(metaclass=ABCMeta):
         release_button: list,
         emulation_speed: int = 0,
         headless: bool = False,
+        profile: str = None,
     ) -> None:
         self.task = task
         self.domain = domain
@@ -36,11 +44,18 @@ class PyboyEnvironment(metaclass=ABCMeta):
 
         self.act_freq = act_freq
 
-        head = "null" if headless else "SDL2"
-        self.pyboy = PyBoy(
-            self.rom_path,
-            window=head,
-        )
+        # A named profile overrides the headless and emulation_speed arguments
+        if profile is None:
+            self.profile = profile_for(headless, emulation_speed)
+        else:
+            self.profile = get_profile(profile)
+        self.headless = self.profile.window == "null"
+        self.emulation_speed = self.profile.emulation_speed
+
+        # Emulators are checked out of a process-local pool and returned on close()
+        self.pyboy = get_pool().acquire(self.rom_path, self.profile)
+        self.ram_watcher = RamWatcher(self.pyboy)
+        self._configure_emulator()
 
         self.prior_game_stats = self._generate_game_stats()
         self.screen = self.pyboy.screen
@@ -49,7 +64,14 @@ class PyboyEnvironment(metaclass=ABCMeta):
 
         self.seed = 0
 
-        self.pyboy.set_emulation_speed(emulation_speed)
+        self.trajectory_writer = None
+        self.video_recorder = None
+        self.metrics = None
+
+        # Extra per-step details (e.g. skipped ticks) filled in while stepping
+        self.step_info: dict[str, any] = {}
+
+        self.pyboy.set_emulation_speed(self.emulation_speed)
 
         self.reset()
 
@@ -58,30 +80,96 @@ class PyboyEnvironment(metaclass=ABCMeta):
         # There isn't a random element to set that I am aware of...
 
     def reset(self) -> np.ndarray:
+        start = time.perf_counter()
         self.steps = 0
 
         with open(self.init_path, "rb") as f:
             self.pyboy.load_state(f)
 
+        self.ram_watcher.sync()
+
         self.prior_game_stats = self._generate_game_stats()
 
-        return self._get_state()
+        state = self._get_state()
+        if self.metrics is not None:
+            self.metrics.record_reset(time.perf_counter() - start)
+        return state
+
+    def _configure_emulator(self) -> None:
+        # One-off emulator/game wrapper setup for subclasses, run before the first reset
+        pass
+
+    def watch_ram(
+        self,
+        name: str,
+        start: int,
+        end: int = None,
+        callback: Callable[[RamChange], None] = None,
+    ) -> None:
+        # Changes in watched ranges are reported each step in self.ram_watcher.changes
+        self.ram_watcher.watch(name, start, end, callback)
+
+    def set_metrics(self, metrics) -> None:
+        # EnvMetrics for this worker's row of a shared MetricsTable, or None
+        self.metrics = metrics
+
+    def set_trajectory_writer(self, writer) -> None:
+        # Pass None to stop recording - the caller owns closing the writer
+        self.trajectory_writer = writer
+
+    def start_recording(self, path: str, every: int = 1, fps: int = 30) -> None:
+        self.stop_recording()
+        self.video_recorder = VideoRecorder(path, fps=fps, every=every)
+
+    def stop_recording(self) -> None:
+        if self.video_recorder is not None:
+            self.video_recorder.close()
+            self.video_recorder = None
+
+    def close(self) -> None:
+        if self.pyboy is None:
+            return
+
+        self.stop_recording()
+
+        get_pool().release(self.rom_path, self.profile, self.pyboy)
+        self.pyboy = None
 
     def grab_frame(self, height: int = 240, width: int = 300) -> np.ndarray:
+        import cv2
+
         frame = np.array(self.screen.image)
         frame = cv2.resize(frame, (width, height))
         # Convert to BGR for use with OpenCV
         frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
         return frame
 
+    @property
+    def render_frames(self) -> bool:
+        # Frames are still rendered when something reads pyboy.screen
+        return (
+            self.profile.render
+            or self.observes_screen
+            or self.video_recorder is not None
+        )
+
     def game_area(self) -> np.ndarray:
         return self.pyboy.game_area()
 
     def step(self, action) -> tuple:
+        start = time.perf_counter()
+        start_frame = self.pyboy.frame_count
         self.steps += 1
+        self.step_info = {}
 
         self._run_action_on_emulator(action)
 
+        if self.ram_watcher.has_watches:
+            self.ram_watcher.update()
+
+        if self.video_recorder is not None:
+            self.video_recorder.capture(self.screen.ndarray)
+
         state = self._get_state()
 
         current_game_stats = self._generate_game_stats()
@@ -92,6 +180,20 @@ class PyboyEnvironment(metaclass=ABCMeta):
 
         self.prior_game_stats = current_game_stats
 
+        if self.trajectory_writer is not None:
+            self.trajectory_writer.record(state, action, reward, done)
+
+        if self.metrics is not None:
+            self.metrics.record_step(
+                time.perf_counter() - start,
+                self.pyboy.frame_count - start_frame,
+                reward,
+                done,
+                truncated,
+                current_game_stats,
+                self.step_info.get("dialog", False),
+            )
+
         return state, reward, done, truncated
 
     def _read_m(self, addr: int) -> int:
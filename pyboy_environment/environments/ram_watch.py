@@ -0,0 +1,93 @@
+"""
+WRAM diff tracking over registered watch ranges.
+
+The watcher keeps a snapshot of WRAM (0xC000-0xDFFF) but only refreshes the watched
+ranges. On update() each range is compared against the snapshot with numpy and the
+changed addresses are reported with their old and new values, firing any callback
+registered for that range.
+"""
+
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+WRAM_START, WRAM_END = 0xC000, 0xE000
+
+# Set bit count of every byte value, for decoding flag regions with numpy
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class RamChange(NamedTuple):
+    addresses: np.ndarray
+    old: np.ndarray
+    new: np.ndarray
+
+
+class RamWatcher:
+    def __init__(self, pyboy) -> None:
+        self.pyboy = pyboy
+        self.snapshot = np.zeros(WRAM_END - WRAM_START, dtype=np.uint8)
+        self.changes: dict[str, RamChange] = {}
+        self._watches: dict[str, tuple] = {}
+
+    @property
+    def has_watches(self) -> bool:
+        return bool(self._watches)
+
+    def watch(
+        self,
+        name: str,
+        start: int,
+        end: int = None,
+        callback: Callable[[RamChange], None] = None,
+    ) -> None:
+        # end is exclusive - a single address is watched when it is omitted
+        end = start + 1 if end is None else end
+        if not WRAM_START <= start < end <= WRAM_END:
+            raise ValueError(f"Watch range {start:#06x}-{end:#06x} is outside WRAM")
+
+        self._watches[name] = (start, end, callback)
+        self._read_into_snapshot(start, end)
+
+    def unwatch(self, name: str) -> None:
+        self._watches.pop(name, None)
+        self.changes.pop(name, None)
+
+    def _read_into_snapshot(self, start: int, end: int) -> None:
+        self.snapshot[start - WRAM_START : end - WRAM_START] = self.pyboy.memory[
+            start:end
+        ]
+
+    def sync(self) -> None:
+        # Refresh the snapshot without reporting changes, e.g. after loading a state
+        self.changes = {}
+        for start, end, _ in self._watches.values():
+            self._read_into_snapshot(start, end)
+
+    def update(self) -> dict[str, RamChange]:
+        current = {
+            name: np.array(self.pyboy.memory[start:end], dtype=np.uint8)
+            for name, (start, end, _) in self._watches.items()
+        }
+
+        # Diff every range before writing back so overlapping ranges all see the change
+        self.changes = {}
+        for name, new in current.items():
+            start = self._watches[name][0]
+            old = self.snapshot[start - WRAM_START : start - WRAM_START + len(new)]
+            changed = np.flatnonzero(new != old)
+            if changed.size:
+                self.changes[name] = RamChange(
+                    changed + start, old[changed], new[changed]
+                )
+
+        for name, new in current.items():
+            start = self._watches[name][0]
+            self.snapshot[start - WRAM_START : start - WRAM_START + len(new)] = new
+
+        for name, change in self.changes.items():
+            callback = self._watches[name][2]
+            if callback is not None:
+                callback(change)
+
+        return self.changes
@@ -0,0 +1,180 @@
+"""
+Asynchronous trajectory writer for dumping (obs, action, reward, done) tuples.
+
+The step loop only appends references to the current chunk; full chunks are
+handed to a background thread which stacks and writes them as compressed .npz
+files alongside an index.json. The hand-off queue is bounded so a slow disk
+applies backpressure to the step loop instead of growing memory without limit.
+Dict observations are stored as one array per key (observations_<key>). A write
+error in the background thread is re-raised on the next record() or close().
+"""
+
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+class TrajectoryWriter:
+    def __init__(
+        self,
+        path: str,
+        chunk_size: int = 1024,
+        max_pending_chunks: int = 4,
+        copy_obs: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.chunk_size = chunk_size
+        # Environments returning a reused observation buffer must be copied on hand-off
+        self.copy_obs = copy_obs
+
+        self.metrics = {
+            "steps": 0,
+            "chunks_submitted": 0,
+            "chunks_written": 0,
+            "bytes_written": 0,
+            "blocked_puts": 0,
+            "blocked_seconds": 0.0,
+            "max_queue_depth": 0,
+        }
+
+        self._chunk = []
+        self._index = []
+        self._steps_written = 0
+        self._queue = queue.Queue(maxsize=max_pending_chunks)
+        self._error = None
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Trajectory writer failed") from error
+
+    def record(self, obs, action, reward: float, done: bool) -> None:
+        self._raise_error()
+
+        if self.copy_obs:
+            if isinstance(obs, dict):
+                obs = {key: np.array(value) for key, value in obs.items()}
+            else:
+                obs = np.array(obs)
+
+        self._chunk.append((obs, action, reward, done))
+        self.metrics["steps"] += 1
+
+        if len(self._chunk) == self.chunk_size:
+            self._submit()
+
+    def _submit(self) -> None:
+        chunk, self._chunk = self._chunk, []
+
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            self.metrics["blocked_puts"] += 1
+            start = time.perf_counter()
+            # Time out periodically so a dead writer thread cannot block the step loop
+            while True:
+                if not self._thread.is_alive():
+                    raise RuntimeError("Trajectory writer thread is not running")
+                try:
+                    self._queue.put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            self.metrics["blocked_seconds"] += time.perf_counter() - start
+
+        self.metrics["chunks_submitted"] += 1
+        self.metrics["max_queue_depth"] = max(
+            self.metrics["max_queue_depth"], self._queue.qsize()
+        )
+
+    def _run(self) -> None:
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            # After a failure the queue is still drained so producers never block
+            if self._error is not None:
+                continue
+            try:
+                self._write_chunk(chunk)
+            except Exception as error:
+                self._error = error
+
+    def _write_chunk(self, chunk: list) -> None:
+        if isinstance(chunk[0][0], dict):
+            observations = {
+                f"observations_{key}": np.stack(
+                    [np.asarray(obs[key]) for obs, _, _, _ in chunk]
+                )
+                for key in chunk[0][0]
+            }
+        else:
+            observations = {
+                "observations": np.stack([np.asarray(obs) for obs, _, _, _ in chunk])
+            }
+        actions = np.stack(
+            [
+                np.asarray(action, dtype=np.float32).reshape(-1)
+                for _, action, _, _ in chunk
+            ]
+        )
+        rewards = np.array([reward for _, _, reward, _ in chunk], dtype=np.float32)
+        dones = np.array([done for _, _, _, done in chunk], dtype=bool)
+
+        file_name = f"chunk_{len(self._index):06d}.npz"
+        file_path = self.path / file_name
+        np.savez_compressed(
+            file_path,
+            **observations,
+            actions=actions,
+            rewards=rewards,
+            dones=dones,
+        )
+
+        self._index.append(
+            {"file": file_name, "start": self._steps_written, "length": len(chunk)}
+        )
+        self._steps_written += len(chunk)
+        self._write_index()
+
+        self.metrics["chunks_written"] += 1
+        self.metrics["bytes_written"] += file_path.stat().st_size
+
+    def _write_index(self) -> None:
+        with open(self.path / "index.json", "w", encoding="utf-8") as file:
+            json.dump({"chunk_size": self.chunk_size, "chunks": self._index}, file)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            if self._chunk:
+                self._submit()
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def __enter__(self) -> "TrajectoryWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def load_trajectory(path: str) -> dict[str, np.ndarray]:
+    with open(Path(path) / "index.json", "r", encoding="utf-8") as file:
+        index = json.load(file)
+
+    chunks = [np.load(Path(path) / chunk["file"]) for chunk in index["chunks"]]
+    if not chunks:
+        return {}
+    return {
+        key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0].files
+    }
@@ -0,0 +1,140 @@
+"""
+Gymnasium-style vector environment over PyboyEnvironment instances.
+
+reset(seed=..., options=...) returns (observations, info) and step(actions) returns
+(observations, rewards, terminated, truncated, info) as batched numpy arrays.
+Finished environments are reset inside step (autoreset); their last observation is
+kept in info["final_observation"] with the info["_final_observation"] mask. The
+info dict is columnar - each numeric game stat is one array with a row per env.
+Bulky stats (the pokered event flag array by default) are left out of the info
+unless requested through info_exclude.
+"""
+
+import numpy as np
+
+from pyboy_environment.environments.pyboy_environment import PyboyEnvironment
+
+# Game stats left out of the per-step info by default
+DEFAULT_INFO_EXCLUDE = ("events",)
+
+
+def flatten_stats(stats: dict, prefix: str = "", exclude: tuple = ()) -> dict[str, any]:
+    # Nested dicts become "parent_child" keys and non-numeric values (names) are dropped
+    flat = {}
+    for key, value in stats.items():
+        if key in exclude:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_stats(value, f"{name}_"))
+        elif isinstance(value, (bool, int, float, np.number)):
+            flat[name] = value
+        elif isinstance(value, (list, tuple, np.ndarray)) and all(
+            isinstance(item, (bool, int, float, np.number)) for item in value
+        ):
+            flat[name] = value
+    return flat
+
+
+class PyboyVectorEnvironment:
+    def __init__(
+        self,
+        envs: list,
+        autoreset_on_truncation: bool = True,
+        info_exclude: tuple = DEFAULT_INFO_EXCLUDE,
+    ) -> None:
+        # Accepts environments or zero-argument factories that build them
+        self.envs: list[PyboyEnvironment] = [
+            env() if callable(env) else env for env in envs
+        ]
+        self.num_envs = len(self.envs)
+        self.autoreset_on_truncation = autoreset_on_truncation
+        # Top level game stats keys kept out of info - pass () to include everything
+        self.info_exclude = tuple(info_exclude)
+
+        # Game stats at the end of the last step, taken before any autoreset
+        self.last_stats: list[dict] = [None] * self.num_envs
+
+    @classmethod
+    def make(
+        cls,
+        domain: str,
+        task: str,
+        num_envs: int,
+        act_freq: int,
+        emulation_speed: int = 0,
+        headless: bool = True,
+        profile: str = "train",
+        env_kwargs: dict = None,
+        **kwargs,
+    ) -> "PyboyVectorEnvironment":
+        from pyboy_environment import suite
+
+        env_kwargs = {} if env_kwargs is None else env_kwargs
+        envs = [
+            suite.make(
+                domain, task, act_freq, emulation_speed, headless, profile, **env_kwargs
+            )
+            for _ in range(num_envs)
+        ]
+        return cls(envs, **kwargs)
+
+    def reset(self, seed: int = None, options: dict = None) -> tuple:
+        # options is accepted for Gymnasium compatibility - tasks take no reset options
+        if seed is not None:
+            for i, env in enumerate(self.envs):
+                env.set_seed(seed + i)
+
+        states = [env.reset() for env in self.envs]
+        self.last_stats = [env.prior_game_stats for env in self.envs]
+        return self._stack(states), self._info([{} for _ in self.envs])
+
+    def step(self, actions: np.ndarray) -> tuple:
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        final_observation = np.full(self.num_envs, None, dtype=object)
+
+        states = []
+        step_infos = []
+        for i, env in enumerate(self.envs):
+            state, rewards[i], terminated[i], truncated[i] = env.step(actions[i])
+            self.last_stats[i] = env.prior_game_stats
+            step_infos.append(env.step_info)
+
+            if terminated[i] or (truncated[i] and self.autoreset_on_truncation):
+                # Copied as some environments reuse their observation buffer
+                if not isinstance(state, dict):
+                    state = np.array(state)
+                final_observation[i] = state
+                state = env.reset()
+            states.append(state)
+
+        info = self._info(step_infos)
+        info["final_observation"] = final_observation
+        info["_final_observation"] = np.array(
+            [obs is not None for obs in final_observation]
+        )
+        return self._stack(states), rewards, terminated, truncated, info
+
+    def _stack(self, states: list) -> np.ndarray:
+        if isinstance(states[0], dict):
+            return {
+                key: np.stack([np.asarray(state[key]) for state in states])
+                for key in states[0]
+            }
+        return np.stack([np.asarray(state) for state in states])
+
+    def _info(self, step_infos: list[dict]) -> dict[str, np.ndarray]:
+        rows = [
+            flatten_stats(stats, exclude=self.info_exclude) for stats in self.last_stats
+        ]
+        info = {key: np.array([row[key] for row in rows]) for key in rows[0]}
+
+        for key in {key for step_info in step_infos for key in step_info}:
+            info[key] = np.array([step_info.get(key, 0) for step_info in step_infos])
+        return info
+
+    def close(self) -> None:
+        for env in self.envs:
+            env.close()
@@ -0,0 +1,115 @@
+"""
+Background video recorder fed with raw 160x144 screen buffers.
+
+The step thread only copies the emulator screen into a bounded queue; upscaling,
+colour conversion and encoding to MP4 (cv2) or GIF (PIL) run on a worker thread.
+Frames are dropped rather than stalling the step loop when the worker falls behind.
+
+PIL has to hold every GIF frame until the file is written, so GIFs are capped at
+max_gif_frames palette frames (900 at 300x240 is about 65 MB); later frames are
+counted in frames_truncated. Use an .mp4 path for long recordings - MP4 frames are
+streamed to disk.
+"""
+
+import queue
+import threading
+from pathlib import Path
+
+import numpy as np
+
+
+class VideoRecorder:
+    def __init__(
+        self,
+        path: str,
+        fps: int = 30,
+        height: int = 240,
+        width: int = 300,
+        every: int = 1,
+        max_queue: int = 256,
+        max_gif_frames: int = 900,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.fps = fps
+        self.height = height
+        self.width = width
+        self.every = every
+        self.max_gif_frames = max_gif_frames
+
+        self.frames_seen = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.frames_truncated = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def capture(self, screen: np.ndarray) -> None:
+        self.frames_seen += 1
+        if (self.frames_seen - 1) % self.every != 0:
+            return
+
+        # The emulator reuses its screen buffer so the RGB planes are copied on hand-off
+        try:
+            self._queue.put_nowait(np.array(screen[:, :, :3]))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def _run(self) -> None:
+        import cv2
+
+        if self.path.suffix == ".gif":
+            self._write_gif(cv2)
+        else:
+            self._write_mp4(cv2)
+
+    def _frames(self, cv2):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            yield cv2.resize(frame, (self.width, self.height))
+
+    def _write_mp4(self, cv2) -> None:
+        writer = cv2.VideoWriter(
+            str(self.path),
+            cv2.VideoWriter_fourcc(*"mp4v"),
+            self.fps,
+            (self.width, self.height),
+        )
+        for frame in self._frames(cv2):
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+            self.frames_written += 1
+        writer.release()
+
+    def _write_gif(self, cv2) -> None:
+        from PIL import Image
+
+        images = []
+        for frame in self._frames(cv2):
+            if len(images) >= self.max_gif_frames:
+                # Drained but not kept so the step loop never blocks on a full queue
+                self.frames_truncated += 1
+                continue
+            # Palette frames take a third of the memory of RGB ones
+            images.append(Image.fromarray(frame).quantize())
+            self.frames_written += 1
+
+        if images:
+            images[0].save(
+                self.path,
+                save_all=True,
+                append_images=images[1:],
+                duration=int(1000 / self.fps),
+                loop=0,
+            )
+
+    def close(self) -> None:
+        if not self._thread.is_alive():
+            return
+
+        self._queue.put(None)
+        self._thread.join()
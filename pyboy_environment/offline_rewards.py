@@ -0,0 +1,216 @@
+"""
+Offline reward evaluation over recorded trajectories - no emulator involved.
+
+Trajectories are StatsRecorder logs (STATS_DTYPE records) or raw WRAM traces
+(*.wram, decoded with decode_wram_trace). A reward variant combines CompiledReward
+terms with the trajectory level exploration terms PokemonBrock uses, all computed
+with numpy over the whole trajectory at once. Trajectories are spread over a
+process pool as (trajectory, variant chunk) tasks, and each task scores its
+variants on the trajectory it loads.
+
+Variants file (json):
+
+    {
+        "xp_and_maps": {
+            "terms": [["xp", "increase", 0.01], ["badges", "gained", 100]],
+            "trajectory_terms": {"new_coord": 1, "new_map": 3, "not_moving": -0.1}
+        }
+    }
+"""
+
+import argparse
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from pyboy_environment.environments.pokemon.reward_engine import CompiledReward
+from pyboy_environment.environments.pokemon.stats_log import load_stats
+from pyboy_environment.environments.pokemon.wram_trace import (
+    decode_wram_trace,
+    load_trace_steps,
+    load_wram_trace,
+)
+
+logging.basicConfig(level=logging.INFO)
+
+
+def episode_ids(records: np.ndarray) -> np.ndarray:
+    # Consecutive episode ids, starting a new one wherever the recorded episode changes
+    episodes = records["episode"]
+    return np.concatenate([[0], np.cumsum(episodes[1:] != episodes[:-1])])
+
+
+def _first_visits(episodes: np.ndarray, *columns: np.ndarray) -> np.ndarray:
+    key = episodes.astype(np.int64)
+    for column in columns:
+        key = key << 8 | column.astype(np.int64)
+    _, first = np.unique(key, return_index=True)
+    visits = np.zeros(len(key), dtype=np.float32)
+    visits[first] = 1
+    return visits
+
+
+# name(records, episodes) -> per-record value, scored on the transition into it
+TRAJECTORY_TERMS = {
+    "new_coord": lambda r, e: _first_visits(e, r["x"], r["y"]),
+    "new_map_coord": lambda r, e: _first_visits(e, r["map_id"], r["x"], r["y"]),
+    "new_map": lambda r, e: _first_visits(e, r["map_id"]),
+    "not_moving": lambda r, e: np.concatenate(
+        [[0], (r["x"][1:] == r["x"][:-1]) & (r["y"][1:] == r["y"][:-1])]
+    ).astype(np.float32),
+}
+
+
+class RewardVariant:
+    def __init__(
+        self, name: str, terms: list = None, trajectory_terms: dict = None
+    ) -> None:
+        self.name = name
+        self.reward = CompiledReward(terms) if terms else None
+        self.trajectory_terms = {} if trajectory_terms is None else trajectory_terms
+
+        for term in self.trajectory_terms:
+            if term not in TRAJECTORY_TERMS:
+                raise ValueError(f"Unknown trajectory term: {term}")
+
+        self.names = (self.reward.names if self.reward else []) + list(
+            self.trajectory_terms
+        )
+
+    def breakdown(self, records: np.ndarray, episodes: np.ndarray) -> np.ndarray:
+        # (transitions, terms) - transitions that cross an episode reset score zero
+        columns = []
+        if self.reward is not None:
+            columns.append(self.reward.breakdown(records[:-1], records[1:]))
+        for term, weight in self.trajectory_terms.items():
+            values = TRAJECTORY_TERMS[term](records, episodes)[1:] * weight
+            columns.append(values[:, None].astype(np.float32))
+
+        breakdown = np.concatenate(columns, axis=1)
+        breakdown[episodes[1:] != episodes[:-1]] = 0
+        return breakdown
+
+    def evaluate(self, records: np.ndarray, episodes: np.ndarray) -> dict[str, any]:
+        breakdown = self.breakdown(records, episodes)
+        rewards = breakdown.sum(axis=1)
+        return {
+            "total": float(rewards.sum()),
+            "mean": float(rewards.mean()) if len(rewards) else 0.0,
+            "episodes": int(episodes[-1]) + 1 if len(episodes) else 0,
+            "terms": dict(zip(self.names, breakdown.sum(axis=0).tolist())),
+        }
+
+
+def load_variants(path: str) -> list[RewardVariant]:
+    with open(path, "r", encoding="utf-8") as f:
+        variants = json.load(f)
+    return [
+        RewardVariant(name, spec.get("terms"), spec.get("trajectory_terms"))
+        for name, spec in variants.items()
+    ]
+
+
+def load_records(path: str) -> np.ndarray:
+    if Path(path).suffix == ".wram":
+        return decode_wram_trace(load_wram_trace(path), steps=load_trace_steps(path))
+    return np.asarray(load_stats(path))
+
+
+def evaluate_trajectory(
+    path: str, variants_path: str, names: list[str] = None
+) -> tuple[str, dict]:
+    # Runs in a worker process - variants are rebuilt there rather than pickled
+    records = load_records(path)
+    if len(records) < 2:
+        return path, {}
+
+    episodes = episode_ids(records)
+    results = {
+        variant.name: variant.evaluate(records, episodes)
+        for variant in load_variants(variants_path)
+        if names is None or variant.name in names
+    }
+    return path, results
+
+
+def evaluate_all(
+    trajectory_paths: list[str],
+    variants_path: str,
+    num_workers: int = None,
+    variants_per_task: int = None,
+) -> dict[str, dict]:
+    names = [variant.name for variant in load_variants(variants_path)]
+    chunk = len(names) if variants_per_task is None else variants_per_task
+    chunks = [names[i : i + chunk] for i in range(0, len(names), chunk)]
+
+    results = {path: {} for path in trajectory_paths}
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(evaluate_trajectory, path, variants_path, chunk_names)
+            for path in trajectory_paths
+            for chunk_names in chunks
+        ]
+        for future in futures:
+            path, trajectory_results = future.result()
+            results[path].update(trajectory_results)
+    return results
+
+
+def summarise(results: dict[str, dict]) -> dict[str, dict]:
+    summary = {}
+    for trajectory_results in results.values():
+        for name, result in trajectory_results.items():
+            entry = summary.setdefault(name, {"total": 0.0, "trajectories": 0})
+            entry["total"] += result["total"]
+            entry["trajectories"] += 1
+    for entry in summary.values():
+        entry["mean_per_trajectory"] = entry["total"] / entry["trajectories"]
+    return summary
+
+
+def get_args():
+    parse_args = argparse.ArgumentParser()
+
+    parse_args.add_argument("-v", "--variants", type=str, required=True)
+
+    # StatsRecorder logs or *.wram traces
+    parse_args.add_argument("-t", "--trajectories", type=str, nargs="+", required=True)
+
+    parse_args.add_argument("-w", "--num_workers", type=int, default=None)
+
+    # Splits the variants across tasks when there are few trajectories
+    parse_args.add_argument("--variants_per_task", type=int, default=None)
+
+    parse_args.add_argument("-r", "--results_path", type=str, default=None)
+
+    return parse_args.parse_args()
+
+
+def main():
+    args = get_args()
+
+    # Fail on a malformed variants file before any worker starts
+    variants = load_variants(args.variants)
+    logging.info(
+        f"Evaluating {len(variants)} variants on {len(args.trajectories)} trajectories"
+    )
+
+    results = evaluate_all(
+        args.trajectories, args.variants, args.num_workers, args.variants_per_task
+    )
+    summary = summarise(results)
+    for name, entry in sorted(
+        summary.items(), key=lambda item: item[1]["mean_per_trajectory"], reverse=True
+    ):
+        logging.info(f"{name}: {entry['mean_per_trajectory']:.3f} per trajectory")
+
+    if args.results_path is not None:
+        with open(args.results_path, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "trajectories": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
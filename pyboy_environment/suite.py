@@ -1,6 +1,31 @@
-from pyboy_environment.environments import PyboyEnvironment
-from pyboy_environment.environments.mario.mario_run import MarioRun
-from pyboy_environment.environments.pokemon.tasks.brock import PokemonBrock
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pyboy_environment.environments import PyboyEnvironment
+
+# (domain, task) -> "module:Class" - task modules are only imported when first made
+_registry: dict[tuple[str, str], str] = {
+    ("mario", "run"): "pyboy_environment.environments.mario.mario_run:MarioRun",
+    (
+        "pokemon",
+        "brock",
+    ): "pyboy_environment.environments.pokemon.tasks.brock:PokemonBrock",
+}
+
+
+def register(domain: str, task: str, entry_point: str) -> None:
+    _registry[(domain, task)] = entry_point
+
+
+def _load(domain: str, task: str) -> type:
+    if (domain, task) not in _registry:
+        if domain not in {registered for registered, _ in _registry}:
+            raise ValueError(f"Unknown pyboy environment: {domain}")
+        raise ValueError(f"Unknown {domain.capitalize()} task: {task}")
+
+    module_name, class_name = _registry[(domain, task)].split(":")
+    return getattr(import_module(module_name), class_name)
 
 
 def make(
@@ -9,18 +34,10 @@ def make(
     act_freq: int,
     emulation_speed: int = 0,
     headless: bool = False,
-) -> PyboyEnvironment:
-
-    if domain == "mario":
-        if task == "run":
-            env = MarioRun(act_freq, emulation_speed, headless)
-        else:
-            raise ValueError(f"Unknown Mario task: {task}")
-    elif domain == "pokemon":
-        if task == "brock":
-            env = PokemonBrock(act_freq, emulation_speed, headless)
-        else:
-            raise ValueError(f"Unknown Pokemon task: {task}")
-    else:
-        raise ValueError(f"Unknown pyboy environment: {task}")
-    return env
+    profile: str = None,
+    **kwargs,
+) -> "PyboyEnvironment":
+    # profile names an emulator profile ("train", "eval", "debug") that overrides
+    # emulation_speed and headless - other keyword arguments go to the task class
+    env_class = _load(domain, task)
+    return env_class(act_freq, emulation_speed, headless, profile=profile, **kwargs)